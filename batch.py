@@ -0,0 +1,229 @@
+from typing import Union, Sequence, Dict, Tuple, Optional
+import numpy as np
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from policy import get_policy
+
+# ------------------- 批量（向量化）计算引擎 -------------------
+# 与 core.calculate_monthly_details / calculate_year_end_bonus 逐项对应，
+# 一次处理 N 名员工 × 12 个月，结果按列（字段 -> 数组）返回。
+
+MONTHLY_FIELDS = ("pre_tax_income", "pension", "medical", "unemployment",
+                  "housing_fund", "taxable_income", "current_tax", "takehome")
+ANNUAL_FIELDS = ("total_pre_tax", "total_housing_fund", "total_tax",
+                 "total_takehome", "total_takehome_with_housing")
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def _rate_table_arrays(table) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """税率表 -> (上限, 税率, 速算扣除数) 三个数组"""
+    limits = np.array([limit for limit, _, _ in table], dtype=np.float64)
+    rates = np.array([rate for _, rate, _ in table], dtype=np.float64)
+    deductions = np.array([deduction for _, _, deduction in table], dtype=np.float64)
+    return limits, rates, deductions
+
+
+def bracket_lookup(amounts: np.ndarray, table) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按税率表查找档位（与标量版一致：取第一个满足 amount <= limit 的档位）
+
+    返回：(档位下标, 税率, 速算扣除数)，形状与 amounts 相同
+    """
+    limits, rates, deductions = _rate_table_arrays(table)
+    idx = np.searchsorted(limits, amounts, side="left")
+    idx = np.minimum(idx, len(limits) - 1)  # 超出最后一档（含NaN）按最高档处理
+    return idx, rates[idx], deductions[idx]
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    向量化保留两位小数，结果与内置 round(x, 2) 逐位一致
+
+    np.round 先计算 x*100 再取整，乘法误差会让恰好落在半分附近的值进错方向；
+    这里用 Veltkamp 拆分求出 x*100 的精确误差项，据此修正半分边界的取舍。
+    """
+    x = np.asarray(values, dtype=np.float64)
+    product = x * 100.0
+    split = x * 134217729.0  # 2**27 + 1
+    high = split - (split - x)
+    low = x - high
+    error = (high * 100.0 - product) + low * 100.0  # x*100 == product + error（精确）
+    rounded = np.rint(product)
+    fraction = product - rounded
+    rounded = rounded + ((fraction == 0.5) & (error > 0)) - ((fraction == -0.5) & (error < 0))
+    return rounded / 100.0
+
+
+def _as_monthly_matrix(values: ArrayLike, name: str) -> np.ndarray:
+    """标量 / (N,) / (N,12) -> 可广播到 (N,12) 的二维数组"""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 0:
+        return arr.reshape(1, 1)
+    if arr.ndim == 1:
+        return arr.reshape(-1, 1)  # 每行一个数值，表示全年12个月相同
+    if arr.ndim == 2 and arr.shape[1] == 12:
+        return arr
+    raise ValueError(f"{name}需为单个数值、长度为N的向量或形如(N,12)的数组")
+
+
+def _as_row_vector(values: ArrayLike, name: str) -> np.ndarray:
+    """标量 / (N,) -> 可广播到 (N,1) 的二维数组"""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 0:
+        return arr.reshape(1, 1)
+    if arr.ndim == 1:
+        return arr.reshape(-1, 1)
+    raise ValueError(f"{name}需为单个数值或长度为N的向量")
+
+
+def city_caps(cities: Union[str, Sequence[str]], year: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按城市取全年各月社保/公积金上限（直接索引已编译的政策表）
+
+    返回：(养老上限, 医疗上限, 失业上限, 公积金基数上限)，形状均为 (N,12)
+    """
+    if isinstance(cities, str):
+        cities = [cities]
+    policy = get_policy(year)
+    names, inverse = np.unique(np.asarray(cities, dtype=object).astype(str), return_inverse=True)
+    codes = np.array([policy.index[city] for city in names], dtype=np.intp)  # 未知城市与标量版一致，抛出 KeyError
+    codes = codes[inverse.reshape(-1)]
+    return tuple(caps[codes] for caps in policy.arrays())
+
+
+def monthly_details_arrays(
+    monthly_salaries: np.ndarray,
+    social_security_bases: np.ndarray,
+    caps: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    housing_fund_rates: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    批量计算核心（不取整）：输入均为可广播到 (N,12) 的数组
+
+    运算顺序与标量版逐项一致，保证浮点结果相同；返回字段在 MONTHLY_FIELDS 基础上
+    额外包含累计值 cumulative_income / cumulative_social_housing /
+    cumulative_housing_fund / cumulative_tax，供年度汇总及其他引擎复用。
+    """
+    pension_upper, medical_upper, unemployment_upper, housing_limit = caps
+    shape = np.broadcast_shapes(monthly_salaries.shape, social_security_bases.shape,
+                                pension_upper.shape, housing_fund_rates.shape, (1, 12))
+    salary = np.broadcast_to(monthly_salaries, shape)
+    base = social_security_bases
+
+    # 1. 当月社保/公积金（含城市上限）
+    pension = np.broadcast_to(np.minimum(base * 0.08, pension_upper), shape)
+    medical = np.broadcast_to(np.minimum(base * 0.02, medical_upper), shape)
+    unemployment = np.broadcast_to(np.minimum(base * 0.005, unemployment_upper), shape)
+    social_total = pension + medical + unemployment
+    housing_fund = np.broadcast_to(np.minimum(base, housing_limit) * housing_fund_rates, shape)
+    total_social_housing = social_total + housing_fund
+
+    # 2. 累计值（cumsum 按月顺序累加，与标量版循环累加结果一致）
+    cumulative_income = np.cumsum(salary, axis=1)
+    cumulative_social_housing = np.cumsum(total_social_housing, axis=1)
+    cumulative_housing_fund = np.cumsum(housing_fund, axis=1)
+
+    # 3. 当月个税：累计税额差分，负值按0处理
+    months = np.arange(1, 13, dtype=np.float64)
+    taxable_income = cumulative_income - 5000 * months - cumulative_social_housing
+    _, rate, deduction = bracket_lookup(taxable_income, TAX_RATE_TABLE)
+    cumulative_tax = taxable_income * rate - deduction
+    previous_tax = np.zeros_like(cumulative_tax)
+    previous_tax[:, 1:] = cumulative_tax[:, :-1]
+    current_tax = np.maximum(cumulative_tax - previous_tax, 0.0)
+
+    # 4. 当月税后收入
+    takehome = np.maximum(salary - social_total - housing_fund - current_tax, 0.0)
+
+    return {
+        "pre_tax_income": salary,
+        "pension": pension,
+        "medical": medical,
+        "unemployment": unemployment,
+        "housing_fund": housing_fund,
+        "taxable_income": taxable_income,
+        "current_tax": current_tax,
+        "takehome": takehome,
+        "cumulative_income": cumulative_income,
+        "cumulative_social_housing": cumulative_social_housing,
+        "cumulative_housing_fund": cumulative_housing_fund,
+        "cumulative_tax": cumulative_tax,
+    }
+
+
+def annual_summary_arrays(details: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """由 monthly_details_arrays 的累计值计算全年汇总（已取整，与标量版一致）"""
+    cumulative_income = details["cumulative_income"][:, -1]
+    cumulative_social_housing = details["cumulative_social_housing"][:, -1]
+    cumulative_tax = details["cumulative_tax"][:, -1]
+    total_housing_fund = round_cents(details["cumulative_housing_fund"][:, -1])
+    total_takehome = round_cents(cumulative_income - cumulative_social_housing - cumulative_tax)
+    return {
+        "total_pre_tax": round_cents(cumulative_income),
+        "total_housing_fund": total_housing_fund,
+        "total_tax": round_cents(cumulative_tax),
+        "total_takehome": total_takehome,
+        "total_takehome_with_housing": total_takehome + total_housing_fund * 2,
+    }
+
+
+def calculate_monthly_details_batch(
+    monthly_salaries: ArrayLike,
+    social_security_bases: ArrayLike,
+    cities: Union[str, Sequence[str]] = "北京",
+    five_insurance_rates: ArrayLike = 0.105,
+    housing_fund_rates: ArrayLike = 0.12,
+    year: Optional[int] = None,
+    engine: str = "float"
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    批量计算 N 名员工全年每月薪资明细（calculate_monthly_details 的向量化版本）
+
+    参数：
+        - monthly_salaries / social_security_bases: 单个数值、长度为N的向量（全年相同）或 (N,12) 数组
+        - cities: 单个城市或长度为N的城市列表
+        - five_insurance_rates / housing_fund_rates: 单个数值或长度为N的向量
+        - year: 政策年度（默认 policy.DEFAULT_POLICY_YEAR）
+        - engine: "float"（默认，与 calculate_monthly_details 逐分一致）或 "cents"
+          （fixedpoint 整数分引擎，年度汇总等于逐月之和，可逐分对账）
+
+    返回（按列存储）：
+        - monthly: 字段 -> (N,12) 数组，另含 month -> (12,) 月份
+        - annual: 字段 -> (N,) 数组
+    """
+    if engine == "cents":
+        from fixedpoint import calculate_monthly_details_cents, cents_to_yuan
+        result = calculate_monthly_details_cents(monthly_salaries, social_security_bases, cities,
+                                                 five_insurance_rates, housing_fund_rates, year)
+        return {"monthly": cents_to_yuan(result["monthly"]), "annual": cents_to_yuan(result["annual"])}
+    if engine != "float":
+        raise ValueError(f"不支持的计算引擎：{engine}")
+
+    salaries = _as_monthly_matrix(monthly_salaries, "月薪")
+    bases = _as_monthly_matrix(social_security_bases, "社保基数")
+    _as_row_vector(five_insurance_rates, "五险比例")  # 与标量版一致，仅校验，不参与计算
+    fund_rates = _as_row_vector(housing_fund_rates, "公积金比例")
+    caps = city_caps(cities, year)
+
+    details = monthly_details_arrays(salaries, bases, caps, fund_rates)
+    monthly = {"month": np.arange(1, 13)}
+    for field in MONTHLY_FIELDS:
+        monthly[field] = round_cents(details[field])
+    return {"monthly": monthly, "annual": annual_summary_arrays(details)}
+
+
+def calculate_year_end_bonus_batch(year_end_bonuses: ArrayLike) -> Dict[str, np.ndarray]:
+    """批量计算年终奖单独计税（calculate_year_end_bonus 的向量化版本）"""
+    bonus = np.asarray(year_end_bonuses, dtype=np.float64)
+    if np.any(bonus <= 0):
+        raise ValueError("年终奖金额必须大于0")
+
+    _, tax_rate, quick_deduction = bracket_lookup(bonus / 12, MONTHLY_TAX_RATE_TABLE)
+    bonus_tax = bonus * tax_rate - quick_deduction
+    bonus_after_tax = bonus - bonus_tax
+
+    return {
+        "tax": round_cents(bonus_tax),
+        "after_tax": round_cents(bonus_after_tax),
+        "tax_rate": round_cents(tax_rate * 100)
+    }
@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import List, Dict, Callable, Iterator, Optional
+import numpy as np
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from policy import get_registry
+from core import calculate_monthly_details, calculate_year_end_bonus
+from batch import calculate_monthly_details_batch, calculate_year_end_bonus_batch
+from fixedpoint import calculate_monthly_details_cents, calculate_monthly_details_decimal
+from taxcli import STARTUP_BUDGET_MS
+
+# ------------------- 性能基准 -------------------
+# 生成合成工资表（覆盖全部城市、年度税率表各档、年终奖档位边界附近），测量：
+#   - 标量函数单次调用延迟（latency_us），含 Decimal 参考实现与整数分引擎的对照
+#   - 吞吐量（rows_per_s）
+#   - 峰值内存（peak_mb，tracemalloc 统计，含 NumPy 数组；批量引擎逐块生成数据，峰值只与块大小有关）
+# 结果写入 JSON；--compare 与基线比较，任一指标劣化超过阈值时退出码为1。
+#
+#   python bench.py --sizes 1,1000,100000 --output baseline.json
+#   python bench.py --sizes 1,1000,100000 --compare baseline.json --threshold 0.2
+#   python bench.py --startup        # 检查命令行入口启动耗时是否在预算内、是否误导入 tkinter / numpy
+
+DEFAULT_SIZES = [1, 100, 10000, 1000000]
+DEFAULT_SCALAR_MAX_ROWS = 10000
+DEFAULT_CHUNK_ROWS = 100000
+
+# 指标方向：True 表示越大越好
+METRIC_HIGHER_IS_BETTER = {"latency_us": False, "rows_per_s": True, "peak_mb": False}
+
+
+def generate_payroll(n_rows: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    生成 n_rows 名员工的合成工资表
+
+    月薪按年度税率表各档均匀抽样（使全年应纳税所得额落在各档内，并带逐月波动），
+    城市覆盖政策库中全部城市，年终奖集中在月度税率表各档边界附近。
+    """
+    rng = np.random.default_rng(seed)
+    cities = np.array(get_registry().cities(), dtype=object)
+
+    # 全年应纳税所得额：先均匀选档，再在档内均匀取值
+    limits = np.array([0.0] + [limit for limit, _, _ in TAX_RATE_TABLE[:-1]] + [2000000.0])
+    bracket = rng.integers(0, len(limits) - 1, n_rows)
+    taxable = rng.uniform(limits[bracket], limits[bracket + 1])
+    # 粗略反推月薪（五险一金约占22.5%），再叠加逐月 ±15% 波动
+    base_salary = (taxable + 60000) / 12 / 0.775
+    salaries = base_salary[:, None] * rng.uniform(0.85, 1.15, (n_rows, 12))
+
+    bonus_edges = np.array([12 * limit for limit, _, _ in MONTHLY_TAX_RATE_TABLE[:-1]])
+    bonuses = bonus_edges[rng.integers(0, len(bonus_edges), n_rows)] + rng.choice(
+        [-100.0, -1.0, -0.01, 0.0, 0.01, 1.0, 100.0], n_rows)
+
+    return {
+        "monthly_salaries": np.round(salaries, 2),
+        "social_security_bases": np.round(base_salary, 2),
+        "cities": cities[rng.integers(0, len(cities), n_rows)],
+        "housing_fund_rates": rng.choice([0.05, 0.07, 0.12], n_rows),
+        "year_end_bonuses": bonuses,
+    }
+
+
+def payroll_chunks(n_rows: int, chunk_rows: int, seed: int = 0) -> Iterator[Dict[str, np.ndarray]]:
+    """逐块生成工资表（每块种子为 seed + 起始行），内存只与块大小有关"""
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_payroll(min(chunk_rows, n_rows - start), seed + start)
+
+
+def _measure(run: Callable[[], Optional[float]], rows: int, calls: int, repeat: int) -> Dict[str, float]:
+    """
+    计时取 repeat 次中最快的一次；峰值内存另跑一次统计（tracemalloc 开启时会明显拖慢计时）。
+    run 返回数值时以其为本次耗时（用于扣除逐块生成数据的时间）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        elapsed = run()
+        best = min(best, time.perf_counter() - start if elapsed is None else elapsed)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "latency_us": round(best / calls * 1e6, 3),
+        "rows_per_s": round(rows / best, 1) if best > 0 else 0.0,
+        "peak_mb": round(peak / 1024 / 1024, 3),
+    }
+
+
+def _run_chunks(chunks: Callable[[], Iterator[Dict[str, np.ndarray]]],
+                compute: Callable[[Dict[str, np.ndarray]], None]) -> Callable[[], float]:
+    """逐块生成并计算，只累计计算耗时"""
+    def run():
+        elapsed = 0.0
+        for chunk in chunks():
+            start = time.perf_counter()
+            compute(chunk)
+            elapsed += time.perf_counter() - start
+        return elapsed
+    return run
+
+
+def bench_scalar_monthly(payroll, repeat):
+    rows = [(payroll["monthly_salaries"][i].tolist(), float(payroll["social_security_bases"][i]),
+             payroll["cities"][i], float(payroll["housing_fund_rates"][i])) for i in range(len(payroll["cities"]))]
+
+    def run():
+        for salaries, base, city, fund_rate in rows:
+            calculate_monthly_details(salaries, base, city, 0.105, fund_rate)
+    return _measure(run, len(rows), len(rows), repeat)
+
+
+def bench_decimal_monthly(payroll, repeat):
+    """Decimal 参考实现（逐人），与 bench_scalar_monthly 对照"""
+    rows = [(payroll["monthly_salaries"][i].tolist(), float(payroll["social_security_bases"][i]),
+             payroll["cities"][i], float(payroll["housing_fund_rates"][i])) for i in range(len(payroll["cities"]))]
+
+    def run():
+        for salaries, base, city, fund_rate in rows:
+            calculate_monthly_details_decimal(salaries, base, city, 0.105, fund_rate)
+    return _measure(run, len(rows), len(rows), repeat)
+
+
+def bench_scalar_bonus(payroll, repeat):
+    bonuses = payroll["year_end_bonuses"].tolist()
+
+    def run():
+        for bonus in bonuses:
+            calculate_year_end_bonus(bonus)
+    return _measure(run, len(bonuses), len(bonuses), repeat)
+
+
+def bench_batch_monthly(chunks, n_rows, repeat, chunk_rows):
+    def compute(chunk):
+        calculate_monthly_details_batch(chunk["monthly_salaries"], chunk["social_security_bases"],
+                                        chunk["cities"], 0.105, chunk["housing_fund_rates"])
+    return _measure(_run_chunks(chunks, compute), n_rows, -(-n_rows // chunk_rows), repeat)
+
+
+def bench_cents_monthly(chunks, n_rows, repeat, chunk_rows):
+    """整数分引擎（fixedpoint），与 bench_batch_monthly 对照"""
+    def compute(chunk):
+        calculate_monthly_details_cents(chunk["monthly_salaries"], chunk["social_security_bases"],
+                                        chunk["cities"], 0.105, chunk["housing_fund_rates"])
+    return _measure(_run_chunks(chunks, compute), n_rows, -(-n_rows // chunk_rows), repeat)
+
+
+def bench_batch_bonus(chunks, n_rows, repeat, chunk_rows):
+    def compute(chunk):
+        calculate_year_end_bonus_batch(chunk["year_end_bonuses"])
+    return _measure(_run_chunks(chunks, compute), n_rows, -(-n_rows // chunk_rows), repeat)
+
+
+# 命令行入口不应在启动时导入的模块
+HEAVY_MODULES = ("tkinter", "numpy")
+
+
+def check_startup(budget_ms: float = STARTUP_BUDGET_MS, runs: int = 5) -> Dict:
+    """
+    测量 python -m taxcli 的冷启动耗时（新进程执行一次年终奖计算，取最快一次），
+    并检查单人计算后是否导入了 HEAVY_MODULES
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "taxcli", "bonus", "100000"], cwd=cwd,
+                       check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+
+    probe = ("import sys, taxcli; taxcli.calculate('monthly', {'monthly_salaries': 30000}); "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", probe], cwd=cwd, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    heavy = [module for module in output.split(",") if module]
+    return {
+        "startup_ms": round(best * 1000, 1),
+        "budget_ms": budget_ms,
+        "heavy_modules": heavy,
+        "ok": best * 1000 <= budget_ms and not heavy,
+    }
+
+
+def run_benchmarks(sizes: List[int], scalar_max_rows: int = DEFAULT_SCALAR_MAX_ROWS,
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS, repeat: int = 3, seed: int = 0) -> Dict:
+    """按各规模运行基准，返回 {"meta": ..., "results": {"场景/规模": 指标}}"""
+    results = {}
+    for size in sizes:
+        if size <= scalar_max_rows:
+            chunks = list(payroll_chunks(size, chunk_rows, seed))
+            payroll = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+            del chunks
+            results[f"scalar_monthly/{size}"] = bench_scalar_monthly(payroll, repeat)
+            results[f"scalar_bonus/{size}"] = bench_scalar_bonus(payroll, repeat)
+            results[f"decimal_monthly/{size}"] = bench_decimal_monthly(payroll, repeat)
+            del payroll
+
+        # 批量引擎在计时循环内逐块生成数据，大规模时也不会把整张工资表放进内存
+        def chunks(size=size):
+            return payroll_chunks(size, chunk_rows, seed)
+        results[f"batch_monthly/{size}"] = bench_batch_monthly(chunks, size, repeat, chunk_rows)
+        results[f"cents_monthly/{size}"] = bench_cents_monthly(chunks, size, repeat, chunk_rows)
+        results[f"batch_bonus/{size}"] = bench_batch_bonus(chunks, size, repeat, chunk_rows)
+        print(f"规模 {size} 完成", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "chunk_rows": chunk_rows,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基线比较，返回劣化超过阈值的指标说明"""
+    regressions = []
+    for name, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(name)
+        if not old_metrics:
+            continue
+        for metric, higher_is_better in METRIC_HIGHER_IS_BETTER.items():
+            new, old = metrics.get(metric), old_metrics.get(metric)
+            if not new or not old:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > threshold:
+                regressions.append(f"{name} {metric}: {old} -> {new}（劣化 {change:.1%}）")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="个税计算性能基准")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="员工人数，逗号分隔（如 1,1000,10000000）")
+    parser.add_argument("--scalar-max-rows", type=int, default=DEFAULT_SCALAR_MAX_ROWS,
+                        help="标量函数只测到该规模为止")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="批量引擎每块行数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果写入 JSON 文件")
+    parser.add_argument("--compare", help="基线 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的劣化比例（0.2 表示20%%）")
+    parser.add_argument("--startup", action="store_true", help="只检查命令行入口的启动耗时")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS, help="启动耗时预算（毫秒）")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        startup = check_startup(args.startup_budget_ms)
+        print(json.dumps(startup, ensure_ascii=False))
+        if not startup["ok"]:
+            print("命令行入口启动超出预算或导入了重模块", file=sys.stderr)
+            return 1
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if not sizes or min(sizes) <= 0 or args.chunk_rows <= 0 or args.repeat <= 0:
+        parser.error("规模、块大小与重复次数必须大于0")
+
+    report = run_benchmarks(sizes, args.scalar_max_rows, args.chunk_rows, args.repeat, args.seed)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("性能劣化：", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"未发现超过 {args.threshold:.0%} 的劣化", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
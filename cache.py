@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from typing import Union, List, Dict, Tuple, Optional, Hashable
+import data
+from policy import get_registry
+from core import calculate_monthly_details, calculate_year_end_bonus
+
+# ------------------- 计算结果缓存（可选） -------------------
+# 相同输入（相同薪资档位、城市、比例）直接返回缓存结果。
+# 单个月薪与12个相同数值的列表视为同一输入；政策库（policy.py）或 data.py 中的税率表变化时自动清空缓存。
+
+DEFAULT_MAXSIZE = 4096
+
+
+def _tables_fingerprint() -> int:
+    """政策库版本号与 data.py 中税率表的指纹，任一变化时指纹随之变化"""
+    return hash((get_registry().version, tuple(data.TAX_RATE_TABLE), tuple(data.MONTHLY_TAX_RATE_TABLE)))
+
+
+def _normalize_series(values: Union[float, List[float]]) -> Tuple[float, ...]:
+    """单个数值 / 12个元素的列表 -> 12个浮点数的元组"""
+    if isinstance(values, (int, float)):
+        return (float(values),) * 12
+    return tuple(float(v) for v in values)
+
+
+class ResultCache:
+    """LRU 缓存，记录命中/未命中/淘汰/失效次数"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须大于0")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_tables(self):
+        """上限/税率表变化时清空缓存（需持有锁）"""
+        fingerprint = _tables_fingerprint()
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def get_or_compute(self, key: Hashable, compute):
+        with self._lock:
+            self._check_tables()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            fingerprint = self._fingerprint
+
+        # 计算在锁外进行；期间上限/税率表若有变化，结果可能按旧表算出，不写入缓存
+        value = compute()
+        with self._lock:
+            self._check_tables()
+            if self._fingerprint != fingerprint:
+                return value
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """清空缓存条目（不重置计数）"""
+        with self._lock:
+            self._entries.clear()
+
+    def resize(self, maxsize: int):
+        """调整容量，超出部分按 LRU 淘汰"""
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须大于0")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """导出统计数据"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+DEFAULT_CACHE = ResultCache()
+
+
+def cached_calculate_monthly_details(
+    monthly_salaries: Union[float, List[float]],
+    social_security_bases: Union[float, List[float]],
+    city: str = "北京",
+    five_insurance_rate: float = 0.105,
+    housing_fund_rate: float = 0.12,
+    cache: Optional[ResultCache] = None,
+    year: Optional[int] = None
+) -> Dict[str, List[Union[float, Dict]]]:
+    """带缓存的 calculate_monthly_details，参数与返回值相同（返回副本，可放心修改）；year 为政策年度"""
+    if isinstance(monthly_salaries, list) and len(monthly_salaries) != 12:
+        raise ValueError("月薪需为单个数值或12个元素的列表")
+    if isinstance(social_security_bases, list) and len(social_security_bases) != 12:
+        raise ValueError("社保基数需为单个数值或12个元素的列表")
+
+    salaries = _normalize_series(monthly_salaries)
+    bases = _normalize_series(social_security_bases)
+    key = ("monthly", salaries, bases, city, float(five_insurance_rate), float(housing_fund_rate), year)
+    result = (cache or DEFAULT_CACHE).get_or_compute(key, lambda: calculate_monthly_details(
+        list(salaries), list(bases), city, five_insurance_rate, housing_fund_rate, year))
+    return {"monthly": [dict(row) for row in result["monthly"]], "annual": dict(result["annual"])}
+
+
+def cached_calculate_year_end_bonus(year_end_bonus: float, cache: Optional[ResultCache] = None) -> Dict[str, float]:
+    """带缓存的 calculate_year_end_bonus，参数与返回值相同"""
+    key = ("bonus", float(year_end_bonus))
+    return dict((cache or DEFAULT_CACHE).get_or_compute(key, lambda: calculate_year_end_bonus(year_end_bonus)))
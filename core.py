@@ -1,21 +1,72 @@
-from typing import Union, List, Dict
-from data import CITY_SOCIAL_UPPER_LIMITS, CITY_HOUSING_FUND_LIMITS, TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from typing import Union, List, Dict, Tuple, Optional
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from policy import get_policy, MonthCaps
+import metrics
 
 # ------------------- 核心计算逻辑 -------------------
+def _calc_social_housing(social_base: float, month_caps: MonthCaps, housing_fund_rate: float) -> Tuple[float, float, float, float]:
+    """计算当月个人社保/公积金（含城市上限），返回 (养老, 医疗, 失业, 公积金)"""
+    pension_upper, medical_upper, unemployment_upper, housing_limit = month_caps
+    # 养老保险（含城市上限）
+    pension = min(social_base * 0.08, pension_upper) 
+    # 医疗保险（**新增上限**）
+    medical = min(social_base * 0.02, medical_upper)  # 医疗保险比例2%
+    # 失业保险（含城市上限）
+    unemployment = min(social_base * 0.005, unemployment_upper) 
+    # 当月公积金（**使用补全的公积金上限**）
+    housing_fund = min(social_base, housing_limit) * housing_fund_rate
+    return pension, medical, unemployment, housing_fund
+
+
+def _calc_cumulative_tax(cumulative_taxable_income: float) -> float:
+    """按年度综合所得税率表计算累计应纳个税"""
+    for limit, rate, deduction in TAX_RATE_TABLE:
+        if cumulative_taxable_income <= limit:
+            return cumulative_taxable_income * rate - deduction
+    return 0.0
+
+
+def _build_annual_summary(
+    cumulative_income: float,
+    cumulative_social_housing: float,
+    cumulative_housing_fund: float,
+    cumulative_tax: float
+) -> Dict[str, float]:
+    """由累计值计算年度汇总"""
+    total_pre_tax = round(cumulative_income, 2) # 全年税前收入
+    total_housing_fund = round(cumulative_housing_fund, 2) # 全年累计单边公积金
+    total_tax = round(cumulative_tax, 2) # 全年累计税收
+    total_takehome = round(cumulative_income - cumulative_social_housing - cumulative_tax, 2) # 全年累计税后收入
+    total_takehome_with_housing = total_takehome + total_housing_fund*2 # 全年累计税后收入, 含双边公积金
+
+    return {
+        "total_pre_tax": total_pre_tax,
+        "total_housing_fund": total_housing_fund,
+        "total_tax": total_tax,
+        "total_takehome": total_takehome,
+        "total_takehome_with_housing": total_takehome_with_housing
+    }
+
+
 def calculate_monthly_details(
     monthly_salaries: Union[float, List[float]],
     social_security_bases: Union[float, List[float]],
     city: str = "北京",
     five_insurance_rate: float = 0.105,
-    housing_fund_rate: float = 0.12
+    housing_fund_rate: float = 0.12,
+    year: Optional[int] = None
 ) -> Dict[str, List[Union[float, Dict]]]:
     """
-    计算本年每月详细薪资数据
+    计算本年每月详细薪资数据（year 为政策年度，默认 policy.DEFAULT_POLICY_YEAR）
     
     返回：
         - monthly: 每个月的当月值明细（表格用）
         - annual_summary: 全年累计值汇总（年度区域用）
     """
+    # 埋点（metrics.ACTIVE 为 None 时不计时）
+    registry = metrics.ACTIVE
+    recorder = metrics.CallRecorder(registry) if registry is not None else None
+
     # 输入标准化（保持不变）
     if isinstance(monthly_salaries, (int, float)):
         monthly_salaries = [monthly_salaries] * 12
@@ -34,52 +85,45 @@ def calculate_monthly_details(
     cumulative_tax = 0.0                     # 累计已缴个税
     monthly_details = []                     # 每月**当月值**明细
     annual_summary = {}                      # 全年**累计值**汇总
-
+    city_caps = get_policy(year).caps_for(city)  # 城市全年各月上限（循环外只查一次）
+    if recorder:
+        recorder.lap("normalize")
 
     for month in range(1, 13):
         current_salary = monthly_salaries[month-1]       # 当月税前收入
         current_social_base = social_security_bases[month-1]  # 当月社保基数
         
         # ------------------- 1. 计算当月社保/公积金（修正医疗保险上限） -------------------
-        # 养老保险（含城市上限）
-        pension_upper = CITY_SOCIAL_UPPER_LIMITS[city]["pension"]
-        pension = min(current_social_base * 0.08, pension_upper) 
-        # 医疗保险（**新增上限**）
-        medical_upper = CITY_SOCIAL_UPPER_LIMITS[city]["medical"]
-        medical = min(current_social_base * 0.02, medical_upper)  # 医疗保险比例2%
-        # 失业保险（含城市上限）
-        unemployment_upper = CITY_SOCIAL_UPPER_LIMITS[city]["unemployment"]
-        unemployment = min(current_social_base * 0.005, unemployment_upper) 
+        pension, medical, unemployment, housing_fund = _calc_social_housing(current_social_base, city_caps[month-1], housing_fund_rate)
         # 当月社保合计
         social_total = pension + medical + unemployment
-        # 当月公积金（**使用补全的公积金上限**）
-        housing_limit = CITY_HOUSING_FUND_LIMITS.get(city, float('inf'))
-        housing_fund = min(current_social_base, housing_limit) * housing_fund_rate
         # 当月五险一金合计
         total_social_housing = social_total + housing_fund
-
+        if recorder:
+            recorder.lap("social_housing")
 
         # ------------------- 2. 计算累计值（用于个税，不放入表格） -------------------
         cumulative_income += current_salary                          # 累计税前收入
         cumulative_social_housing += total_social_housing            # 累计五险一金
         cumulative_housing_fund += housing_fund                      # 累计公积金
+        if recorder:
+            recorder.lap("cumulative")
 
         # ------------------- 3. 计算当月个税（保持不变） -------------------
         cumulative_taxable_income = cumulative_income - 5000 * month - cumulative_social_housing
-        cumulative_monthly_tax = 0.0
-        for limit, rate, deduction in TAX_RATE_TABLE:
-            if cumulative_taxable_income <= limit:
-                cumulative_monthly_tax = cumulative_taxable_income * rate - deduction
-                break
+        cumulative_monthly_tax = _calc_cumulative_tax(cumulative_taxable_income)
         current_month_tax = cumulative_monthly_tax - cumulative_tax
         current_month_tax = max(current_month_tax, 0.0)
         cumulative_tax = cumulative_monthly_tax
-
+        if recorder:
+            recorder.lap("tax")
+            recorder.bracket(metrics.bracket_level(TAX_RATE_TABLE, cumulative_taxable_income))
 
         # ------------------- 4. 计算当月税后收入（保持不变） -------------------
         takehome = current_salary - social_total - housing_fund - current_month_tax
         takehome = max(takehome, 0.0)
-
+        if recorder:
+            recorder.lap("takehome")
 
         # ------------------- 5. 保存当月**单月值**到表格（新增医疗保险上限） -------------------
         monthly_details.append({
@@ -93,24 +137,16 @@ def calculate_monthly_details(
             "current_tax": round(current_month_tax, 2),
             "takehome": round(takehome, 2)
         })
+        if recorder:
+            recorder.lap("rounding")
 
 
     # ------------------- 6. 计算全年累计值 -------------------
-    total_pre_tax = round(cumulative_income, 2) # 全年税前收入
-    total_housing_fund = round(cumulative_housing_fund, 2) # 全年累计单边公积金
-    total_tax = round(cumulative_tax, 2) # 全年累计税收
-    total_takehome = round(cumulative_income - cumulative_social_housing - cumulative_tax, 2) # 全年累计税后收入
-    total_takehome_with_housing = total_takehome + total_housing_fund*2 # 全年累计税后收入, 含双边公积金
-
-
-    annual_summary = {
-        "total_pre_tax": total_pre_tax,
-        "total_housing_fund": total_housing_fund,
-        "total_tax": total_tax,
-        "total_takehome": total_takehome,
-        "total_takehome_with_housing": total_takehome_with_housing
-    }
-
+    annual_summary = _build_annual_summary(cumulative_income, cumulative_social_housing,
+                                           cumulative_housing_fund, cumulative_tax)
+    if recorder:
+        recorder.lap("annual_summary")
+        recorder.finish_monthly(city)
 
     return {"monthly": monthly_details, "annual": annual_summary}
 
@@ -119,9 +155,11 @@ def calculate_year_end_bonus(year_end_bonus: float) -> Dict[str, float]:
     """计算年终奖单独计税的个税、税率及税后金额"""
     if year_end_bonus <= 0:
         raise ValueError("年终奖金额必须大于0")
+    registry = metrics.ACTIVE
+    recorder = metrics.CallRecorder(registry) if registry is not None else None
     
     monthly_income = year_end_bonus / 12
-    for limit, rate, deduction in MONTHLY_TAX_RATE_TABLE:
+    for level, (limit, rate, deduction) in enumerate(MONTHLY_TAX_RATE_TABLE, 1):
         if monthly_income <= limit:
             tax_rate = rate
             quick_deduction = deduction
@@ -132,6 +170,8 @@ def calculate_year_end_bonus(year_end_bonus: float) -> Dict[str, float]:
     
     bonus_tax = year_end_bonus * tax_rate - quick_deduction
     bonus_after_tax = year_end_bonus - bonus_tax
+    if recorder:
+        recorder.finish_bonus(level)
     
     return {
         "tax": round(bonus_tax, 2),
@@ -1,20 +1,32 @@
+from types import MappingProxyType
+
 ### ------------------- 五险一金上限、税率 -------------------
 
-# 城市每月社保上限（养老、失业、医疗）
-CITY_SOCIAL_UPPER_LIMITS = {
-    "北京": {"pension": 2864.88, "unemployment": 179.06, "medical": 716.22},
-    "杭州": {"pension": 1994.4, "unemployment": 124.65, "medical": 498.6},
-    "上海": {"pension": 2984.16, "unemployment": 186.51, "medical": 746.04},
-    "深圳": {"pension": 2200.08, "unemployment": 221.325, "medical": 673.32}, # 养老保险上限未更新仍按27501计算; 职工一档医保
-}
+# 城市社保/公积金上限已移至 policies/*.json（按城市、生效期维护，见 policy.py）。
+# 以下两个字典为兼容旧代码保留的只读视图：取默认政策年度12月的上限，首次访问时生成。
+#   CITY_SOCIAL_UPPER_LIMITS: 城市每月社保上限（养老、失业、医疗）
+#   CITY_HOUSING_FUND_LIMITS: 城市公积金基数上限（无上限的城市不在其中）
+_LEGACY_VIEWS = {}
+
+
+def __getattr__(name):
+    if name not in ("CITY_SOCIAL_UPPER_LIMITS", "CITY_HOUSING_FUND_LIMITS"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from policy import get_registry, get_policy
+    registry = get_registry()
+    policy = get_policy()
+    if _LEGACY_VIEWS.get("version") != registry.version:
+        december = {city: policy.caps_for(city)[11] for city in policy.cities}
+        _LEGACY_VIEWS.update(
+            version=registry.version,
+            CITY_SOCIAL_UPPER_LIMITS=MappingProxyType({
+                city: MappingProxyType({"pension": caps[0], "unemployment": caps[2], "medical": caps[1]})
+                for city, caps in december.items()}),
+            CITY_HOUSING_FUND_LIMITS=MappingProxyType(
+                {city: caps[3] for city, caps in december.items() if caps[3] != float('inf')}),
+        )
+    return _LEGACY_VIEWS[name]
 
-# 城市公积金基数上限（与社保上限一致，可根据政策调整）
-CITY_HOUSING_FUND_LIMITS = {
-    "北京": 35811,
-    "杭州": 40694, 
-    "上海": 37302,  # 上海2024年社平工资为12434元。故2025年度缴存基数上限据此计算为37302元，上海公积金比例上限7%
-    "深圳": 44265,
-}
 
 # 年度综合所得税率表（保持不变，用于工资薪金计税）
 TAX_RATE_TABLE = [
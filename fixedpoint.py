@@ -0,0 +1,223 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union, List, Dict, Sequence, Optional
+import numpy as np
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from policy import get_policy
+from batch import MONTHLY_FIELDS, ArrayLike, round_cents, city_caps, _as_monthly_matrix, _as_row_vector
+
+# ------------------- 定点（整数分）计算引擎 -------------------
+# 全部金额以 int64 分计算，每一步按明确规则取整，结果可逐分对账：
+#   - 输入金额（月薪、社保基数、城市上限）先按 round(x, 2) 取到分
+#   - 比例以万分之一为单位（0.12 -> 1200），公积金比例最多精确到0.01%
+#   - 养老/医疗/失业/公积金：基数 × 比例后四舍五入到分，再与城市上限（分）取小
+#   - 累计预扣税额：累计应纳税所得额（分）× 税率后四舍五入到分，再减速算扣除数；当月个税为累计税额之差（负值按0）
+#   - 四舍五入均为"绝对值四舍五入"（ROUND_HALF_UP，负数向远离0的方向进位）
+# 年度汇总为12个月对应字段逐月相加（total_takehome = 每月 takehome 之和，以此类推），
+# 因此逐月明细与年度汇总严格相等。与浮点引擎相比：
+#   - 只有逐项缴费（养老/医疗/失业/公积金）保证相差不超过1分；
+#   - 累计字段不保证：累计应纳税所得额（taxable_income）由逐月取整后的缴费累加，差额随月份漂移（可达一两角），
+#     当月个税、税后由累计值之差得到，也会相差几分；年度值通常相差几角以内；
+#   - 某月个税或税后被截为0时，浮点引擎的年度值按累计值计算、与逐月之和不等，两者差额可能较大（可达百元量级）。
+# calculate_monthly_details_decimal 是按同一规则用 Decimal 实现的逐人参考版本，用于校验与基准对比。
+
+_INT64_MAX = np.iinfo(np.int64).max
+_RATE_SCALE = 10000  # 比例单位：万分之一
+_CENT = Decimal("0.01")
+
+# 五险个人比例（万分之一）：养老8%、医疗2%、失业0.5%
+PENSION_RATE = 800
+MEDICAL_RATE = 200
+UNEMPLOYMENT_RATE = 50
+
+
+def to_cents(values: ArrayLike) -> np.ndarray:
+    """元 -> 分（int64），先按 round(x, 2) 取整；inf（无上限）映射为 int64 最大值"""
+    arr = np.asarray(values, dtype=np.float64)
+    cents = np.rint(round_cents(np.where(np.isinf(arr), 0.0, arr)) * 100).astype(np.int64)
+    return np.where(np.isinf(arr), _INT64_MAX, cents)
+
+
+def _rate_units(values: ArrayLike, name: str) -> np.ndarray:
+    """比例 -> 万分之一整数"""
+    arr = np.asarray(values, dtype=np.float64)
+    units = np.rint(arr * _RATE_SCALE)
+    if np.any(np.abs(arr * _RATE_SCALE - units) > 1e-6):
+        raise ValueError(f"{name}最多精确到0.01%")
+    return units.astype(np.int64)
+
+
+def _div_half_up(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """整数除法，绝对值四舍五入（denominator 为正偶数）"""
+    quotient = (np.abs(numerator) + denominator // 2) // denominator
+    return np.where(numerator < 0, -quotient, quotient)
+
+
+def _tax_table_cents(table):
+    """税率表 -> (上限（分）, 税率（万分之一）, 速算扣除数（分）)"""
+    limits = np.array([_INT64_MAX if limit == float('inf') else int(round(limit * 100)) for limit, _, _ in table],
+                      dtype=np.int64)
+    rates = np.array([int(round(rate * _RATE_SCALE)) for _, rate, _ in table], dtype=np.int64)
+    deductions = np.array([int(round(deduction * 100)) for _, _, deduction in table], dtype=np.int64)
+    return limits, rates, deductions
+
+
+def _cumulative_tax_cents(taxable: np.ndarray) -> np.ndarray:
+    limits, rates, deductions = _tax_table_cents(TAX_RATE_TABLE)
+    idx = np.minimum(np.searchsorted(limits, taxable, side="left"), len(limits) - 1)
+    return _div_half_up(taxable * rates[idx], _RATE_SCALE) - deductions[idx]
+
+
+def calculate_monthly_details_cents(
+    monthly_salaries: ArrayLike,
+    social_security_bases: ArrayLike,
+    cities: Union[str, Sequence[str]] = "北京",
+    five_insurance_rates: ArrayLike = 0.105,
+    housing_fund_rates: ArrayLike = 0.12,
+    year: Optional[int] = None
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    参数同 batch.calculate_monthly_details_batch，全部结果为 int64 分
+
+    返回：
+        - monthly: 字段 -> (N,12) int64 数组（字段同 batch.MONTHLY_FIELDS），另含 month
+        - annual: 字段 -> (N,) int64 数组（字段同 batch.ANNUAL_FIELDS，均为逐月相加）
+    """
+    salaries = _as_monthly_matrix(monthly_salaries, "月薪")
+    bases = _as_monthly_matrix(social_security_bases, "社保基数")
+    _as_row_vector(five_insurance_rates, "五险比例")  # 与其他引擎一致，仅校验，不参与计算
+    fund_rates = _rate_units(_as_row_vector(housing_fund_rates, "公积金比例"), "公积金比例")
+    pension_upper, medical_upper, unemployment_upper, housing_limit = (to_cents(caps) for caps in city_caps(cities, year))
+
+    shape = np.broadcast_shapes(salaries.shape, bases.shape, pension_upper.shape, fund_rates.shape, (1, 12))
+    salary = np.broadcast_to(to_cents(salaries), shape)
+    base = to_cents(bases)
+
+    # 1. 当月社保/公积金（先按比例取整到分，再与上限取小）
+    pension = np.broadcast_to(np.minimum(_div_half_up(base * PENSION_RATE, _RATE_SCALE), pension_upper), shape)
+    medical = np.broadcast_to(np.minimum(_div_half_up(base * MEDICAL_RATE, _RATE_SCALE), medical_upper), shape)
+    unemployment = np.broadcast_to(np.minimum(_div_half_up(base * UNEMPLOYMENT_RATE, _RATE_SCALE),
+                                              unemployment_upper), shape)
+    housing_fund = np.broadcast_to(_div_half_up(np.minimum(base, housing_limit) * fund_rates, _RATE_SCALE), shape)
+    social_housing = pension + medical + unemployment + housing_fund
+
+    # 2~3. 累计值与当月个税（整数加法，不存在累加误差）
+    months = np.arange(1, 13, dtype=np.int64)
+    taxable_income = np.cumsum(salary, axis=1) - 500000 * months - np.cumsum(social_housing, axis=1)
+    cumulative_tax = _cumulative_tax_cents(taxable_income)
+    previous_tax = np.zeros_like(cumulative_tax)
+    previous_tax[:, 1:] = cumulative_tax[:, :-1]
+    current_tax = np.maximum(cumulative_tax - previous_tax, 0)
+
+    # 4. 当月税后收入
+    takehome = np.maximum(salary - social_housing - current_tax, 0)
+
+    monthly = {
+        "month": np.arange(1, 13),
+        "pre_tax_income": salary,
+        "pension": pension,
+        "medical": medical,
+        "unemployment": unemployment,
+        "housing_fund": housing_fund,
+        "taxable_income": taxable_income,
+        "current_tax": current_tax,
+        "takehome": takehome,
+    }
+    total_housing_fund = housing_fund.sum(axis=1)
+    total_takehome = takehome.sum(axis=1)
+    annual = {
+        "total_pre_tax": salary.sum(axis=1),
+        "total_housing_fund": total_housing_fund,
+        "total_tax": current_tax.sum(axis=1),
+        "total_takehome": total_takehome,
+        "total_takehome_with_housing": total_takehome + total_housing_fund * 2,
+    }
+    return {"monthly": monthly, "annual": annual}
+
+
+def calculate_year_end_bonus_cents(year_end_bonuses: ArrayLike) -> Dict[str, np.ndarray]:
+    """年终奖单独计税（分）：tax / after_tax 为 int64 分，tax_rate 为百分比"""
+    bonus = to_cents(year_end_bonuses)
+    if np.any(bonus <= 0):
+        raise ValueError("年终奖金额必须大于0")
+    limits, rates, deductions = _tax_table_cents(MONTHLY_TAX_RATE_TABLE)
+    # bonus / 12 <= limit  <=>  bonus <= limit * 12（整数比较，无除法误差）
+    twelve_limits = np.where(limits == _INT64_MAX, _INT64_MAX, limits * 12)
+    idx = np.minimum(np.searchsorted(twelve_limits, bonus, side="left"), len(limits) - 1)
+    bonus_tax = _div_half_up(bonus * rates[idx], _RATE_SCALE) - deductions[idx]
+    return {
+        "tax": bonus_tax,
+        "after_tax": bonus - bonus_tax,
+        "tax_rate": rates[idx] / 100.0
+    }
+
+
+def cents_to_yuan(result: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """分 -> 元（float64），month / tax_rate 原样保留"""
+    return {field: values if field in ("month", "tax_rate") else values / 100.0 for field, values in result.items()}
+
+
+# ------------------- Decimal 参考实现（逐人） -------------------
+def _to_decimal(value: float) -> Decimal:
+    return Decimal(repr(round(value, 2)))
+
+
+def _decimal_cumulative_tax(taxable: Decimal) -> Decimal:
+    for limit, rate, deduction in TAX_RATE_TABLE:
+        if limit == float('inf') or taxable <= Decimal(repr(limit)):
+            return (taxable * Decimal(repr(rate))).quantize(_CENT, ROUND_HALF_UP) - Decimal(repr(deduction))
+    return Decimal(0)
+
+
+def calculate_monthly_details_decimal(
+    monthly_salaries: Union[float, List[float]],
+    social_security_bases: Union[float, List[float]],
+    city: str = "北京",
+    five_insurance_rate: float = 0.105,
+    housing_fund_rate: float = 0.12,
+    year: Optional[int] = None
+) -> Dict[str, Union[List[Dict], Dict]]:
+    """与 calculate_monthly_details_cents 规则相同的 Decimal 实现（单人，结果为整数分）"""
+    if isinstance(monthly_salaries, (int, float)):
+        monthly_salaries = [monthly_salaries] * 12
+    if isinstance(social_security_bases, (int, float)):
+        social_security_bases = [social_security_bases] * 12
+    if len(monthly_salaries) != 12 or len(social_security_bases) != 12:
+        raise ValueError("月薪/社保基数需为单个数值或12个元素的列表")
+    fund_rate = Decimal(int(_rate_units(housing_fund_rate, "公积金比例"))) / _RATE_SCALE
+    city_caps_by_month = get_policy(year).caps_for(city)
+
+    cumulative_income = cumulative_social_housing = cumulative_tax = Decimal(0)
+    monthly = []
+    for month in range(1, 13):
+        salary = _to_decimal(monthly_salaries[month-1])
+        base = _to_decimal(social_security_bases[month-1])
+        pension_upper, medical_upper, unemployment_upper, housing_limit = city_caps_by_month[month-1]
+        pension = min((base * Decimal("0.08")).quantize(_CENT, ROUND_HALF_UP), _to_decimal(pension_upper))
+        medical = min((base * Decimal("0.02")).quantize(_CENT, ROUND_HALF_UP), _to_decimal(medical_upper))
+        unemployment = min((base * Decimal("0.005")).quantize(_CENT, ROUND_HALF_UP), _to_decimal(unemployment_upper))
+        fund_base = base if housing_limit == float('inf') else min(base, _to_decimal(housing_limit))
+        housing_fund = (fund_base * fund_rate).quantize(_CENT, ROUND_HALF_UP)
+        social_housing = pension + medical + unemployment + housing_fund
+
+        cumulative_income += salary
+        cumulative_social_housing += social_housing
+        taxable_income = cumulative_income - 5000 * month - cumulative_social_housing
+        month_cumulative_tax = _decimal_cumulative_tax(taxable_income)
+        current_tax = max(month_cumulative_tax - cumulative_tax, Decimal(0))
+        cumulative_tax = month_cumulative_tax
+        takehome = max(salary - social_housing - current_tax, Decimal(0))
+
+        values = (salary, pension, medical, unemployment, housing_fund, taxable_income, current_tax, takehome)
+        monthly.append({"month": month, **{field: int(value * 100) for field, value in zip(MONTHLY_FIELDS, values)}})
+
+    def total(field):
+        return sum(row[field] for row in monthly)
+
+    annual = {
+        "total_pre_tax": total("pre_tax_income"),
+        "total_housing_fund": total("housing_fund"),
+        "total_tax": total("current_tax"),
+        "total_takehome": total("takehome"),
+    }
+    annual["total_takehome_with_housing"] = annual["total_takehome"] + annual["total_housing_fund"] * 2
+    return {"monthly": monthly, "annual": annual}
@@ -0,0 +1,146 @@
+from typing import Union, List, Dict, Optional
+from core import _calc_social_housing, _calc_cumulative_tax, _build_annual_summary
+from policy import get_policy
+
+# ------------------- 年度台账（增量重算） -------------------
+# 保存每个月结束时的累计状态（累计收入、累计五险一金、累计公积金、累计个税），
+# 修改第 k 个月时只需从第 k-1 个月的累计状态出发重算 k..12 月；
+# 每月发薪后可逐月追加。计算规则与 calculate_monthly_details 完全一致。
+
+
+class YearLedger:
+    def __init__(self, city: str = "北京", five_insurance_rate: float = 0.105, housing_fund_rate: float = 0.12,
+                 year: Optional[int] = None):
+        self.city = city
+        self.five_insurance_rate = five_insurance_rate
+        self.housing_fund_rate = housing_fund_rate
+        self.year = year
+        self._caps = get_policy(year).caps_for(city)  # 城市全年各月上限
+        self._salaries: List[float] = []
+        self._bases: List[float] = []
+        self._months: List[Dict[str, float]] = []  # 每月的当月值及月末累计状态
+
+    @classmethod
+    def from_year(
+        cls,
+        monthly_salaries: Union[float, List[float]],
+        social_security_bases: Union[float, List[float]],
+        city: str = "北京",
+        five_insurance_rate: float = 0.105,
+        housing_fund_rate: float = 0.12,
+        year: Optional[int] = None
+    ) -> "YearLedger":
+        """由全年数据建立台账（参数与 calculate_monthly_details 相同）"""
+        if isinstance(monthly_salaries, (int, float)):
+            monthly_salaries = [monthly_salaries] * 12
+        elif isinstance(monthly_salaries, list) and len(monthly_salaries) != 12:
+            raise ValueError("月薪需为单个数值或12个元素的列表")
+        if isinstance(social_security_bases, (int, float)):
+            social_security_bases = [social_security_bases] * 12
+        elif isinstance(social_security_bases, list) and len(social_security_bases) != 12:
+            raise ValueError("社保基数需为单个数值或12个元素的列表")
+
+        ledger = cls(city, five_insurance_rate, housing_fund_rate, year)
+        ledger._salaries = list(monthly_salaries)
+        ledger._bases = list(social_security_bases)
+        ledger._recompute_from(1)
+        return ledger
+
+    def __len__(self) -> int:
+        """已入账月数"""
+        return len(self._months)
+
+    def append_month(self, salary: float, social_base: float) -> Dict[str, float]:
+        """追加下一个月（发薪结账），返回该月明细"""
+        if len(self._months) >= 12:
+            raise ValueError("全年12个月已全部入账")
+        self._salaries.append(salary)
+        self._bases.append(social_base)
+        self._recompute_from(len(self._salaries))
+        return self.monthly_details()[-1]
+
+    def update_month(self, month: int, salary: Optional[float] = None, social_base: Optional[float] = None):
+        """修改第 month 个月的月薪/社保基数，只重算 month 及之后的月份"""
+        if not 1 <= month <= len(self._months):
+            raise ValueError(f"月份需在1-{len(self._months)}之间")
+        if salary is not None:
+            self._salaries[month-1] = salary
+        if social_base is not None:
+            self._bases[month-1] = social_base
+        self._recompute_from(month)
+
+    def _recompute_from(self, first_month: int):
+        """从 first_month 起重算，累计值取自上月月末状态"""
+        del self._months[first_month-1:]
+        if self._months:
+            previous = self._months[-1]
+            cumulative_income = previous["cumulative_income"]
+            cumulative_social_housing = previous["cumulative_social_housing"]
+            cumulative_housing_fund = previous["cumulative_housing_fund"]
+            cumulative_tax = previous["cumulative_tax"]
+        else:
+            cumulative_income = cumulative_social_housing = cumulative_housing_fund = cumulative_tax = 0.0
+
+        for month in range(first_month, len(self._salaries) + 1):
+            current_salary = self._salaries[month-1]
+            pension, medical, unemployment, housing_fund = _calc_social_housing(
+                self._bases[month-1], self._caps[month-1], self.housing_fund_rate)
+            social_total = pension + medical + unemployment
+
+            cumulative_income += current_salary
+            cumulative_social_housing += social_total + housing_fund
+            cumulative_housing_fund += housing_fund
+
+            cumulative_taxable_income = cumulative_income - 5000 * month - cumulative_social_housing
+            cumulative_monthly_tax = _calc_cumulative_tax(cumulative_taxable_income)
+            current_month_tax = max(cumulative_monthly_tax - cumulative_tax, 0.0)
+            cumulative_tax = cumulative_monthly_tax
+
+            takehome = max(current_salary - social_total - housing_fund - current_month_tax, 0.0)
+            self._months.append({
+                "pre_tax_income": current_salary,
+                "pension": pension,
+                "medical": medical,
+                "unemployment": unemployment,
+                "housing_fund": housing_fund,
+                "taxable_income": cumulative_taxable_income,
+                "current_tax": current_month_tax,
+                "takehome": takehome,
+                "cumulative_income": cumulative_income,
+                "cumulative_social_housing": cumulative_social_housing,
+                "cumulative_housing_fund": cumulative_housing_fund,
+                "cumulative_tax": cumulative_tax,
+            })
+
+    def monthly_details(self) -> List[Dict[str, float]]:
+        """已入账月份的当月值明细（格式同 calculate_monthly_details 的 monthly）"""
+        return [{
+            "month": month,
+            "pre_tax_income": round(state["pre_tax_income"], 2),
+            "pension": round(state["pension"], 2),
+            "medical": round(state["medical"], 2),
+            "unemployment": round(state["unemployment"], 2),
+            "housing_fund": round(state["housing_fund"], 2),
+            "taxable_income": round(state["taxable_income"], 2),
+            "current_tax": round(state["current_tax"], 2),
+            "takehome": round(state["takehome"], 2)
+        } for month, state in enumerate(self._months, start=1)]
+
+    def cumulative_state(self, month: Optional[int] = None) -> Dict[str, float]:
+        """第 month 个月（默认最近一个月）月末累计状态（未取整）"""
+        if not self._months:
+            return {"cumulative_income": 0.0, "cumulative_social_housing": 0.0,
+                    "cumulative_housing_fund": 0.0, "cumulative_tax": 0.0}
+        state = self._months[(month or len(self._months)) - 1]
+        return {key: state[key] for key in ("cumulative_income", "cumulative_social_housing",
+                                              "cumulative_housing_fund", "cumulative_tax")}
+
+    def annual_summary(self) -> Dict[str, float]:
+        """截至最近一个月的累计汇总（12个月入账后即全年汇总）"""
+        state = self.cumulative_state()
+        return _build_annual_summary(state["cumulative_income"], state["cumulative_social_housing"],
+                                     state["cumulative_housing_fund"], state["cumulative_tax"])
+
+    def result(self) -> Dict[str, List[Union[float, Dict]]]:
+        """格式同 calculate_monthly_details 的返回值"""
+        return {"monthly": self.monthly_details(), "annual": self.annual_summary()}
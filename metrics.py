@@ -0,0 +1,237 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Optional, Iterator
+
+# ------------------- 运行指标（可选） -------------------
+# 默认关闭：ACTIVE 为 None 时计算函数只多做一次 None 判断，不计时、不计数。
+# 开启后 calculate_monthly_details 记录各阶段耗时（对应函数内编号的阶段）、各城市调用次数、
+# 每月命中的年度税率档位，calculate_year_end_bonus 记录耗时与命中的月度税率档位。
+#
+#   registry = metrics.enable()            # 长期开启（如服务进程）
+#   print(registry.to_prometheus())
+#
+#   with metrics.profile_run() as registry:   # 只统计一次运行
+#       calculate_monthly_details(30000, 30000, "上海")
+#   print(registry.snapshot())
+
+# 调用耗时直方图的默认桶上限（秒）
+DEFAULT_LATENCY_BUCKETS = (0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01)
+
+# calculate_monthly_details 内的阶段名（与函数内注释的编号对应）
+MONTHLY_STAGES = ("normalize", "social_housing", "cumulative", "tax", "takehome", "rounding", "annual_summary")
+
+_BRACKET_HITS_DOC = "税率档位命中次数（table=annual 为逐月累计预扣，monthly 为年终奖）"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增计数器（可带标签）"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, LabelKey, float]]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, key, value
+
+    def snapshot(self) -> Dict[str, float]:
+        return {_format_labels(key) or "": value for key, value in sorted(self._values.items())}
+
+
+class Histogram:
+    """累计桶直方图（Prometheus 语义：bucket{le} 为不超过上限的观测次数）"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock,
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values: Dict[LabelKey, List[float]] = {}  # 各桶计数（非累计） + [sum]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self) -> Iterator[Tuple[str, LabelKey, float]]:
+        for key, counts in sorted(self._values.items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (("le", _format_value(upper)),), cumulative
+            yield f"{self.name}_sum", key, counts[-1]
+            yield f"{self.name}_count", key, cumulative
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {_format_labels(key) or "": {"count": sum(counts[:-1]), "sum": counts[-1]}
+                for key, counts in sorted(self._values.items())}
+
+
+class MetricsRegistry:
+    """指标注册表：按名称获取/创建计数器与直方图，导出 Prometheus 文本格式"""
+
+    def __init__(self, namespace: str = "taxcalc"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(full_name)
+                if metric is None:
+                    metric = self._metrics[full_name] = cls(full_name, documentation, self._lock, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"指标 {full_name} 已注册为 {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str = "") -> Counter:
+        return self._get_or_create(Counter, name, documentation)
+
+    def histogram(self, name: str, documentation: str = "",
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, buckets=buckets)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """全部指标的当前值（字典形式，便于测试与日志）"""
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（exposition format 0.0.4）"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                if metric.documentation:
+                    lines.append(f"# HELP {name} {metric.documentation}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                for sample_name, key, value in metric.samples():
+                    lines.append(f"{sample_name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ------------------- 计算函数埋点 -------------------
+class CallRecorder:
+    """单次调用内的本地累加器：各阶段耗时、档位命中先记在本地，调用结束时一次性写入注册表"""
+
+    __slots__ = ("registry", "_start", "_last", "_stages", "_brackets")
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._start = self._last = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._brackets: Dict[int, int] = {}
+
+    def lap(self, stage: str):
+        """把上一次打点以来的耗时计入 stage"""
+        now = time.perf_counter()
+        self._stages[stage] = self._stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def bracket(self, level: int):
+        """记录命中的档位（自身耗时不计入任何阶段）"""
+        self._brackets[level] = self._brackets.get(level, 0) + 1
+        self._last = time.perf_counter()
+
+    def finish_monthly(self, city: str):
+        registry = self.registry
+        registry.counter("monthly_calls_total", "calculate_monthly_details 调用次数").inc(city=city)
+        registry.histogram("monthly_call_seconds", "calculate_monthly_details 单次耗时（秒）").observe(
+            self._last - self._start)
+        stage_seconds = registry.counter("monthly_stage_seconds_total", "calculate_monthly_details 各阶段累计耗时（秒）")
+        for stage, seconds in self._stages.items():
+            stage_seconds.inc(seconds, stage=stage)
+        hits = registry.counter("bracket_hits_total", _BRACKET_HITS_DOC)
+        for level, count in self._brackets.items():
+            hits.inc(count, table="annual", level=level)
+
+    def finish_bonus(self, level: int):
+        now = time.perf_counter()
+        registry = self.registry
+        registry.histogram("bonus_call_seconds", "calculate_year_end_bonus 单次耗时（秒）").observe(now - self._start)
+        registry.counter("bracket_hits_total", _BRACKET_HITS_DOC).inc(table="monthly", level=level)
+
+
+def bracket_level(table: List[Tuple[float, float, float]], amount: float) -> int:
+    """amount 所在税率档位（从1开始，与税率表的级数一致）"""
+    for level, (limit, _, _) in enumerate(table, 1):
+        if amount <= limit:
+            return level
+    return len(table)
+
+
+# 当前生效的注册表；None 表示关闭
+ACTIVE: Optional[MetricsRegistry] = None
+
+
+def enable(registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """开启埋点，返回生效的注册表"""
+    global ACTIVE
+    ACTIVE = registry if registry is not None else MetricsRegistry()
+    return ACTIVE
+
+
+def disable():
+    global ACTIVE
+    ACTIVE = None
+
+
+@contextmanager
+def profile_run(registry: Optional[MetricsRegistry] = None) -> Iterator[MetricsRegistry]:
+    """在 with 块内开启埋点（默认使用新的注册表），退出后恢复原状态"""
+    global ACTIVE
+    previous = ACTIVE
+    ACTIVE = registry if registry is not None else MetricsRegistry()
+    try:
+        yield ACTIVE
+    finally:
+        ACTIVE = previous
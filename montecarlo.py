@@ -0,0 +1,175 @@
+from typing import List, Dict, Optional, Sequence, Union
+import numpy as np
+from policy import get_policy, DEFAULT_POLICY_YEAR
+from batch import round_cents, monthly_details_arrays, annual_summary_arrays, calculate_year_end_bonus_batch
+
+# ------------------- 多年收入蒙特卡洛模拟 -------------------
+# 每条路径模拟连续若干年的月薪、社保基数与年终奖：
+#   - 调薪：从第2年起每年1月按正态分布的比例调薪
+#   - 跳槽：每年以一定概率在2~12月中随机一个月跳槽，当月起月薪按跳槽涨幅变化
+#   - 社保基数：每年7月重置为上一年平均月薪，次年1~6月沿用（第1年上一年平均月薪视为初始基数）
+#   - 年终奖：年末按 月薪 × 正态分布的月数 发放，单独计税
+# 全年个税按全年累计值计算（相当于年度汇算结果，跳槽不影响全年税额），逐年在全部路径上向量化计算。
+# 路径按 chunk_size 分块执行，内存只与块大小有关；每块使用 SeedSequence 派生的独立随机数，
+# 相同 seed 与 chunk_size 下结果完全可复现。
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# 每条路径每年保存的字段
+PATH_FIELDS = ("pre_tax", "tax", "takehome", "takehome_with_housing", "social_base")
+
+
+class SimulationResult:
+    """模拟结果：values[字段] 形状为 (路径数, 年数)，years 为对应的政策年度"""
+
+    def __init__(self, years: List[int], values: Dict[str, np.ndarray]):
+        self.years = years
+        self.values = values
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.values[field]
+
+    def percentiles(self, field: str = "takehome", q: Sequence[float] = DEFAULT_PERCENTILES,
+                    cumulative: bool = False) -> np.ndarray:
+        """各年分位数，形状 (len(q), 年数)；cumulative=True 时为截至各年的累计值"""
+        values = self.values[field]
+        if cumulative:
+            values = np.cumsum(values, axis=1)
+        return np.percentile(values, q, axis=0)
+
+    def summary(self, field: str = "takehome", q: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+        """分位数汇总：{"yearly": {年度: {"p50": ...}}, "total": {"p50": ...}}（total 为全部年度合计）"""
+        yearly = self.percentiles(field, q)
+        total = np.percentile(self.values[field].sum(axis=1), q)
+        return {
+            "yearly": {year: {f"p{p:g}": round(float(yearly[i, j]), 2) for i, p in enumerate(q)}
+                       for j, year in enumerate(self.years)},
+            "total": {f"p{p:g}": round(float(total[i]), 2) for i, p in enumerate(q)},
+        }
+
+
+def _simulate_chunk(
+    rng: np.random.Generator,
+    n_paths: int,
+    years: List[int],
+    start_salary: float,
+    initial_base: float,
+    cities: List[str],
+    housing_fund_rate: float,
+    raise_mean: float,
+    raise_std: float,
+    job_change_prob: float,
+    job_change_raise_mean: float,
+    job_change_raise_std: float,
+    bonus_months_mean: float,
+    bonus_months_std: float
+) -> Dict[str, np.ndarray]:
+    """模拟一块路径，返回 字段 -> (n_paths, 年数)"""
+    out = {field: np.empty((n_paths, len(years))) for field in PATH_FIELDS}
+    city_idx = rng.integers(0, len(cities), n_paths)
+    monthly = np.full(n_paths, float(start_salary))
+    base_first_half = np.full(n_paths, float(initial_base))   # 当年1~6月社保基数
+    previous_average = np.full(n_paths, float(initial_base))  # 上一年平均月薪（7月起的基数）
+    months = np.arange(12)
+
+    for j, year in enumerate(years):
+        if j > 0:
+            monthly = round_cents(monthly * np.maximum(1 + rng.normal(raise_mean, raise_std, n_paths), 0.0))
+        salaries = np.repeat(monthly[:, None], 12, axis=1)
+
+        # 跳槽：第 change_month 个月（0起，1~11即2~12月）起按新月薪发放
+        change = rng.random(n_paths) < job_change_prob
+        change_month = rng.integers(1, 12, n_paths)
+        new_monthly = round_cents(monthly * np.maximum(
+            1 + rng.normal(job_change_raise_mean, job_change_raise_std, n_paths), 0.0))
+        salaries = np.where(change[:, None] & (months >= change_month[:, None]), new_monthly[:, None], salaries)
+        monthly = np.where(change, new_monthly, monthly)
+
+        # 社保基数：1~6月沿用上一年7月的基数，7月起为上一年平均月薪
+        bases = np.empty((n_paths, 12))
+        bases[:, :6] = base_first_half[:, None]
+        bases[:, 6:] = previous_average[:, None]
+        base_first_half = previous_average
+        previous_average = round_cents(salaries.mean(axis=1))
+
+        policy = get_policy(year)
+        codes = np.array([policy.index[city] for city in cities], dtype=np.intp)[city_idx]
+        caps = tuple(cap[codes] for cap in policy.arrays())
+        annual = annual_summary_arrays(monthly_details_arrays(salaries, bases, caps, np.array([[housing_fund_rate]])))
+
+        bonus = round_cents(monthly * np.maximum(rng.normal(bonus_months_mean, bonus_months_std, n_paths), 0.0))
+        bonus_tax = np.zeros(n_paths)
+        has_bonus = bonus > 0
+        if has_bonus.any():
+            bonus_tax[has_bonus] = calculate_year_end_bonus_batch(bonus[has_bonus])["tax"]
+
+        out["pre_tax"][:, j] = annual["total_pre_tax"] + bonus
+        out["tax"][:, j] = annual["total_tax"] + bonus_tax
+        out["takehome"][:, j] = annual["total_takehome"] + (bonus - bonus_tax)
+        out["takehome_with_housing"][:, j] = annual["total_takehome_with_housing"] + (bonus - bonus_tax)
+        out["social_base"][:, j] = bases[:, -1]
+    return out
+
+
+def simulate_income_paths(
+    start_salary: float,
+    city: Union[str, Sequence[str]] = "北京",
+    n_paths: int = 100000,
+    n_years: int = 5,
+    start_year: Optional[int] = None,
+    initial_base: Optional[float] = None,
+    housing_fund_rate: float = 0.12,
+    raise_mean: float = 0.05,
+    raise_std: float = 0.03,
+    job_change_prob: float = 0.15,
+    job_change_raise_mean: float = 0.2,
+    job_change_raise_std: float = 0.1,
+    bonus_months_mean: float = 2.0,
+    bonus_months_std: float = 1.0,
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> SimulationResult:
+    """
+    模拟 n_paths 条路径、n_years 年的收入
+
+    参数：
+        - start_salary: 第1年1月的税前月薪
+        - city: 城市；传入多个城市时每条路径随机分配其一
+        - start_year: 第1年的政策年度（默认 policy.DEFAULT_POLICY_YEAR），之后逐年加1
+        - initial_base: 第1年的社保基数（默认同 start_salary）
+        - raise_mean / raise_std: 每年调薪比例的均值/标准差
+        - job_change_prob: 每年跳槽概率；job_change_raise_mean / std: 跳槽涨幅
+        - bonus_months_mean / std: 年终奖月数（小于0按0处理）
+        - seed: 随机种子（None 表示不固定）
+    返回：SimulationResult（金额均为全年值，takehome 为税后现金含年终奖）
+    """
+    if start_salary <= 0:
+        raise ValueError("起始月薪必须大于0")
+    if n_paths <= 0 or n_years <= 0 or chunk_size <= 0:
+        raise ValueError("路径数、年数与块大小必须大于0")
+    if not 0 <= job_change_prob <= 1:
+        raise ValueError("跳槽概率需在0-1之间")
+    cities = [city] if isinstance(city, str) else list(city)
+    start_year = DEFAULT_POLICY_YEAR if start_year is None else start_year
+    years = [start_year + j for j in range(n_years)]
+    for year in years:
+        unknown = [name for name in cities if name not in get_policy(year).index]
+        if not cities or unknown:
+            raise ValueError(f"不支持的城市：{', '.join(unknown) or '（空）'}")
+
+    n_chunks = -(-n_paths // chunk_size)
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    values = {field: np.empty((n_paths, n_years)) for field in PATH_FIELDS}
+    for chunk, child in enumerate(children):
+        start = chunk * chunk_size
+        size = min(chunk_size, n_paths - start)
+        result = _simulate_chunk(
+            np.random.default_rng(child), size, years, start_salary,
+            start_salary if initial_base is None else initial_base, cities, housing_fund_rate,
+            raise_mean, raise_std, job_change_prob, job_change_raise_mean, job_change_raise_std,
+            bonus_months_mean, bonus_months_std
+        )
+        for field in PATH_FIELDS:
+            values[field][start:start + size] = result[field]
+    return SimulationResult(years, values)
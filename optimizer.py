@@ -0,0 +1,93 @@
+from typing import Union, Sequence, Dict, Optional
+import numpy as np
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from batch import ArrayLike, city_caps, bracket_lookup, monthly_details_arrays, round_cents
+
+# ------------------- 年终奖 / 工资拆分优化 -------------------
+# 年度总包 P 拆为工资（12个月平均发放）与年终奖 B：
+#   总税额 f(B) = 工资个税(P - B - 60000 - 全年五险一金) + 年终奖个税(B)
+# 工资个税随 B 连续分段线性；年终奖个税在月度税率表各档边界处向上跳变（即"多发少得"区间）。
+# 每段内 f 为线性，最小值只可能出现在分段端点，因此只需比较以下候选点：
+#   B = 0、B = P、各年终奖档位边界 12 × 月度上限、各工资税率档边界 P - 60000 - 五险一金 - 年度上限
+
+
+def _annual_social_housing(social_security_bases: np.ndarray, cities, housing_fund_rates: np.ndarray,
+                           year: Optional[int] = None) -> np.ndarray:
+    """全年五险一金（与 calculate_monthly_details 累计方式一致），形状 (N,)"""
+    details = monthly_details_arrays(np.zeros((1, 1)), social_security_bases.reshape(-1, 1),
+                                     city_caps(cities, year), housing_fund_rates.reshape(-1, 1))
+    return details["cumulative_social_housing"][:, -1]
+
+
+def _salary_tax(taxable: np.ndarray) -> np.ndarray:
+    """工资薪金全年个税（应纳税所得额为负时按0计）"""
+    _, rate, deduction = bracket_lookup(taxable, TAX_RATE_TABLE)
+    return np.maximum(taxable * rate - deduction, 0.0)
+
+
+def _bonus_tax(bonus: np.ndarray) -> np.ndarray:
+    """年终奖单独计税个税（与 calculate_year_end_bonus 一致，年终奖为0时个税为0）"""
+    _, rate, deduction = bracket_lookup(bonus / 12, MONTHLY_TAX_RATE_TABLE)
+    return np.where(bonus > 0, bonus * rate - deduction, 0.0)
+
+
+def optimize_bonus_split(
+    total_packages: ArrayLike,
+    social_security_bases: ArrayLike,
+    cities: Union[str, Sequence[str]] = "北京",
+    housing_fund_rates: ArrayLike = 0.12,
+    year: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    求使全年个税最少的年终奖/工资拆分（支持批量）
+
+    参数：
+        - total_packages: 年度税前总包（工资 + 年终奖），单个数值或长度为N的向量
+        - social_security_bases: 社保基数（不随拆分变化），单个数值或长度为N的向量
+        - cities / housing_fund_rates: 单个值或长度为N的向量
+        - year: 政策年度（默认 policy.DEFAULT_POLICY_YEAR）
+
+    返回（均为 (N,) 数组，金额已取整到分）：
+        - bonus / monthly_salary: 最优年终奖与对应月薪
+        - salary_tax / bonus_tax / total_tax: 最优拆分下的工资个税、年终奖个税、合计
+        - tax_saving: 相比全部按工资发放（年终奖为0）少缴的个税
+    """
+    packages = np.atleast_1d(np.asarray(total_packages, dtype=np.float64))
+    if np.any(packages < 0):
+        raise ValueError("年度总包不能为负数")
+    bases = np.atleast_1d(np.asarray(social_security_bases, dtype=np.float64))
+    fund_rates = np.atleast_1d(np.asarray(housing_fund_rates, dtype=np.float64))
+    n_rows = np.broadcast_shapes(packages.shape, bases.shape, fund_rates.shape,
+                                 (1 if isinstance(cities, str) else len(cities),))
+    packages = np.broadcast_to(packages, n_rows)
+    social_housing = np.broadcast_to(_annual_social_housing(bases, cities, fund_rates, year), n_rows)
+    deductible = 60000 + social_housing  # 全年基本减除费用 + 五险一金
+
+    # 候选年终奖：(N, K)
+    bonus_edges = np.array([12 * limit for limit, _, _ in MONTHLY_TAX_RATE_TABLE if np.isfinite(limit)])
+    salary_edges = np.array([limit for limit, _, _ in TAX_RATE_TABLE if np.isfinite(limit)])
+    candidates = np.concatenate([
+        np.zeros((len(packages), 1)),
+        packages[:, None],
+        np.broadcast_to(bonus_edges, (len(packages), len(bonus_edges))),
+        (packages - deductible)[:, None] - np.append(salary_edges, 0.0),
+    ], axis=1)
+    candidates = np.clip(candidates, 0.0, packages[:, None])
+    candidates.sort(axis=1)  # 税额相同时取年终奖较少的方案
+
+    salary_tax = _salary_tax(packages[:, None] - candidates - deductible[:, None])
+    bonus_tax = _bonus_tax(candidates)
+    total_tax = salary_tax + bonus_tax
+    best = np.argmin(total_tax, axis=1)
+    rows = np.arange(len(packages))
+
+    bonus = candidates[rows, best]
+    no_bonus_tax = _salary_tax(packages - deductible)
+    return {
+        "bonus": round_cents(bonus),
+        "monthly_salary": round_cents((packages - bonus) / 12),
+        "salary_tax": round_cents(salary_tax[rows, best]),
+        "bonus_tax": round_cents(bonus_tax[rows, best]),
+        "total_tax": round_cents(total_tax[rows, best]),
+        "tax_saving": round_cents(no_bonus_tax - total_tax[rows, best]),
+    }
@@ -0,0 +1,140 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Union, Sequence, Dict, List, Tuple, Optional
+import numpy as np
+from batch import (MONTHLY_FIELDS, ANNUAL_FIELDS, ArrayLike, city_caps, round_cents,
+                   monthly_details_arrays, annual_summary_arrays, calculate_monthly_details_batch)
+
+# ------------------- 多进程分片计算 -------------------
+# 输入/输出数组统一放在一块共享内存中，子进程按行区间 [start, stop) 直接读写，
+# 不经 pickle 传递数据；每个分片写回自己的行区间，合并顺序天然确定。
+
+DEFAULT_CHUNK_SIZE = 50000
+
+_INPUT_LAYOUT = {
+    "monthly_salaries": ((12,), np.float64),
+    "social_security_bases": ((12,), np.float64),
+    "housing_fund_rates": ((), np.float64),
+    "city_codes": ((), np.int32),
+}
+
+
+def _build_layout(n_rows: int) -> Dict[str, Tuple[int, Tuple[int, ...], str]]:
+    """共享内存布局：名称 -> (字节偏移, 形状, dtype)，每个数组按64字节对齐"""
+    columns = dict(_INPUT_LAYOUT)
+    columns.update({field: ((12,), np.float64) for field in MONTHLY_FIELDS})
+    columns.update({field: ((), np.float64) for field in ANNUAL_FIELDS})
+    layout = {}
+    offset = 0
+    for name, (row_shape, dtype) in columns.items():
+        shape = (n_rows,) + row_shape
+        layout[name] = (offset, shape, np.dtype(dtype).str)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += (size + 63) // 64 * 64
+    return layout
+
+
+def _layout_size(layout) -> int:
+    return max(max(offset + int(np.prod(shape)) * np.dtype(dtype).itemsize
+                   for offset, shape, dtype in layout.values()), 1)
+
+
+def _views(buffer, layout) -> Dict[str, np.ndarray]:
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()}
+
+
+# 子进程状态（由 _init_worker 设置）
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_caps: Tuple[np.ndarray, ...] = ()
+
+
+def _init_worker(shm_name: str, layout, city_names: List[str], year: Optional[int]):
+    global _worker_shm, _worker_arrays, _worker_caps
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_arrays = _views(_worker_shm.buf, layout)
+    _worker_caps = city_caps(city_names, year)  # 每个城市一行 (城市数, 12)
+
+
+def _compute_shard(arrays: Dict[str, np.ndarray], caps_by_code: Tuple[np.ndarray, ...], start: int, stop: int):
+    """计算 [start, stop) 行并写回 arrays 中对应的输出区间"""
+    codes = arrays["city_codes"][start:stop]
+    caps = tuple(cap[codes] for cap in caps_by_code)
+    details = monthly_details_arrays(
+        arrays["monthly_salaries"][start:stop],
+        arrays["social_security_bases"][start:stop],
+        caps,
+        arrays["housing_fund_rates"][start:stop].reshape(-1, 1)
+    )
+    for field in MONTHLY_FIELDS:
+        arrays[field][start:stop] = round_cents(details[field])
+    for field, values in annual_summary_arrays(details).items():
+        arrays[field][start:stop] = values
+
+
+def _run_shard(bounds: Tuple[int, int]) -> Tuple[int, int]:
+    _compute_shard(_worker_arrays, _worker_caps, *bounds)
+    return bounds
+
+
+def calculate_monthly_details_parallel(
+    monthly_salaries: ArrayLike,
+    social_security_bases: ArrayLike,
+    cities: Union[str, Sequence[str]] = "北京",
+    five_insurance_rates: ArrayLike = 0.105,
+    housing_fund_rates: ArrayLike = 0.12,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    year: Optional[int] = None
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    多进程版 calculate_monthly_details_batch，参数与返回值格式相同
+
+    额外参数：
+        - workers: 进程数（默认 CPU 核数）
+        - chunk_size: 每个分片的行数；行数不超过一个分片或 workers=1 时直接在当前进程计算
+    """
+    if chunk_size <= 0:
+        raise ValueError("分片大小必须大于0")
+    workers = workers or os.cpu_count() or 1
+
+    salaries = np.asarray(monthly_salaries, dtype=np.float64)
+    bases = np.asarray(social_security_bases, dtype=np.float64)
+    fund_rates = np.asarray(housing_fund_rates, dtype=np.float64)
+    city_list = [cities] if isinstance(cities, str) else list(cities)
+    n_rows = max(len(salaries) if salaries.ndim else 1, len(bases) if bases.ndim else 1,
+                 fund_rates.size, len(city_list))
+
+    if workers == 1 or n_rows <= chunk_size:
+        return calculate_monthly_details_batch(monthly_salaries, social_security_bases, cities,
+                                               five_insurance_rates, housing_fund_rates, year)
+
+    layout = _build_layout(n_rows)
+    shm = shared_memory.SharedMemory(create=True, size=_layout_size(layout))
+    arrays = {}
+    try:
+        arrays = _views(shm.buf, layout)
+        # 写入输入（标量 / (N,) / (N,12) 均广播到完整形状）
+        arrays["monthly_salaries"][:] = salaries.reshape(-1, 1) if salaries.ndim == 1 else salaries
+        arrays["social_security_bases"][:] = bases.reshape(-1, 1) if bases.ndim == 1 else bases
+        arrays["housing_fund_rates"][:] = fund_rates
+        city_names, city_codes = np.unique(np.asarray(city_list, dtype=object).astype(str), return_inverse=True)
+        arrays["city_codes"][:] = city_codes.reshape(-1)
+        city_caps(list(city_names), year)  # 未知城市在主进程中提前抛出 KeyError
+
+        shards = [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_worker,
+                                 initargs=(shm.name, layout, list(city_names), year)) as pool:
+            for _ in pool.map(_run_shard, shards):
+                pass
+
+        monthly = {"month": np.arange(1, 13)}
+        monthly.update({field: arrays[field].copy() for field in MONTHLY_FIELDS})
+        annual = {field: arrays[field].copy() for field in ANNUAL_FIELDS}
+    finally:
+        arrays.clear()  # 释放共享内存上的视图后才能关闭
+        shm.close()
+        shm.unlink()
+    return {"monthly": monthly, "annual": annual}
@@ -0,0 +1,52 @@
+import math
+from typing import Union, List, Optional
+
+# ------------------- 输入解析（runner / server / taxcli 共用） -------------------
+# 只依赖标准库，命令行入口导入本模块不会拖慢启动。
+# 月薪/社保基数可为：单个数值、12个数值的列表，或以 ";" 分隔的字符串（CSV、命令行）。
+# NaN、Infinity 与 bool 一律视为非法输入。
+
+
+def is_number(value) -> bool:
+    """有限的 int / float（排除 bool、NaN、Infinity 以及超出 float 范围的整数）"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    try:
+        return math.isfinite(value)
+    except OverflowError:  # 超大整数无法转换为 float
+        return False
+
+
+def parse_series(value: Union[str, float, List[float]], name: str,
+                 max_abs: Optional[float] = None) -> Union[float, List[float]]:
+    """
+    单个数值或12个数值 -> float 或12个 float 的列表（非法时抛出 ValueError）
+
+    参数：
+        - name: 字段中文名，用于错误信息
+        - max_abs: 单个金额的绝对值上限（None 表示不限）
+    """
+    if isinstance(value, str):
+        parts = [p for p in value.split(";") if p.strip()]
+        if not parts:
+            raise ValueError(f"{name}不能为空")
+        try:
+            value = float(parts[0]) if len(parts) == 1 else [float(p) for p in parts]
+        except ValueError:
+            raise ValueError(f"{name}需为单个数值或12个数值：{value}") from None
+    if is_number(value):
+        values = [value]
+    elif isinstance(value, list) and len(value) == 12 and all(is_number(v) for v in value):
+        values = value
+    else:
+        raise ValueError(f"{name}需为单个数值或12个数值")
+    if max_abs is not None and any(abs(v) > max_abs for v in values):
+        raise ValueError(f"{name}绝对值不能超过 {max_abs:.0e}")
+    return float(value) if is_number(value) else [float(v) for v in value]
+
+
+def parse_rate(value, name: str) -> float:
+    """缴存比例（小数）：有限数值且 0 <= 比例 < 1"""
+    if not is_number(value) or not 0 <= value < 1:
+        raise ValueError(f"{name} 需为0-1之间的小数（不含1）")
+    return float(value)
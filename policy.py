@@ -0,0 +1,172 @@
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Sequence
+
+# ------------------- 城市社保/公积金政策库 -------------------
+# 数据文件：policies/*.json，格式为 {城市: [{effective: "YYYY-MM", pension, medical, unemployment,
+#   housing_fund_base（可选，缺省表示无上限）, note（可选）}, ...]}
+# 社保基数上限一般每年7月调整，同一城市可有多个生效期；某月适用生效月份不晚于该月的最新一期，
+# 最早生效年度内早于生效月份的月份按最早一期处理；早于最早生效年度的年份视为该城市无数据。
+# 数据文件在首次计算时才读取；每个年份编译一次，编译结果按 (城市下标, 月份) 直接索引。
+
+POLICY_DIR = Path(__file__).resolve().parent / "policies"
+DEFAULT_POLICY_YEAR = 2025
+
+CAP_FIELDS = ("pension", "medical", "unemployment", "housing_fund_base")
+
+MonthCaps = Tuple[float, float, float, float]  # (养老上限, 医疗上限, 失业上限, 公积金基数上限)
+
+
+def _parse_effective(value: str) -> Tuple[int, int]:
+    """"2025-07" -> (2025, 7)"""
+    year, month = (int(part) for part in str(value).split("-"))
+    if not 1 <= month <= 12:
+        raise ValueError(f"生效月份格式错误：{value}")
+    return year, month
+
+
+class CompiledPolicy:
+    """某一年度全部城市的上限表：month_caps[城市下标][月份-1] = (养老, 医疗, 失业, 公积金基数)"""
+
+    __slots__ = ("year", "cities", "index", "month_caps", "_arrays")
+
+    def __init__(self, year: int, cities: List[str], month_caps: List[Tuple[MonthCaps, ...]]):
+        self.year = year
+        self.cities = tuple(cities)
+        self.index = {city: i for i, city in enumerate(cities)}
+        self.month_caps = month_caps
+        self._arrays = None
+
+    def caps_for(self, city: str) -> Tuple[MonthCaps, ...]:
+        """城市全年12个月的上限（未知城市抛出 KeyError）"""
+        return self.month_caps[self.index[city]]
+
+    def arrays(self):
+        """NumPy 形式：四个 (城市数, 12) 数组，顺序同 CAP_FIELDS（首次调用时生成）"""
+        if self._arrays is None:
+            import numpy as np
+            table = np.array(self.month_caps, dtype=np.float64).reshape(len(self.cities), 12, 4)
+            self._arrays = tuple(np.ascontiguousarray(table[:, :, j]) for j in range(4))
+        return self._arrays
+
+
+class PolicyRegistry:
+    """政策数据注册表：延迟加载数据文件，按年份编译并缓存；数据变化时 version 递增（首次加载不算变化）"""
+
+    def __init__(self, paths: Optional[Sequence[Path]] = None):
+        self._paths = list(paths) if paths is not None else None
+        self._periods: Optional[Dict[str, List[Dict]]] = None
+        self._compiled: Dict[int, CompiledPolicy] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def _ensure_loaded(self) -> Dict[str, List[Dict]]:
+        if self._periods is None:
+            with self._lock:
+                if self._periods is None:
+                    periods: Dict[str, List[Dict]] = {}
+                    paths = self._paths if self._paths is not None else sorted(POLICY_DIR.glob("*.json"))
+                    for path in paths:
+                        with open(path, "r", encoding="utf-8") as f:
+                            for city, entries in json.load(f).items():
+                                periods.setdefault(city, []).extend(self._validate(city, entry) for entry in entries)
+                    for entries in periods.values():
+                        entries.sort(key=lambda entry: entry["effective"])
+                    self._periods = {city: entries for city, entries in periods.items() if entries}
+        return self._periods
+
+    @staticmethod
+    def _validate(city: str, entry: Dict) -> Dict:
+        try:
+            period = {"effective": _parse_effective(entry["effective"])}
+            for field in CAP_FIELDS[:3]:
+                period[field] = float(entry[field])
+            housing = entry.get("housing_fund_base")
+            period["housing_fund_base"] = float('inf') if housing is None else float(housing)
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"城市 {city} 政策数据格式错误：{e}") from e
+        return period
+
+    def cities(self) -> List[str]:
+        return list(self._ensure_loaded())
+
+    def periods(self, city: str) -> List[Dict]:
+        """城市各生效期（按生效月份升序）"""
+        return [dict(period) for period in self._ensure_loaded()[city]]
+
+    def add_period(self, city: str, effective: str, pension: float, medical: float, unemployment: float,
+                   housing_fund_base: Optional[float] = None):
+        """新增（或覆盖同一生效月份的）城市政策，已编译的年份随之失效"""
+        period = self._validate(city, {"effective": effective, "pension": pension, "medical": medical,
+                                       "unemployment": unemployment, "housing_fund_base": housing_fund_base})
+        periods = self._ensure_loaded()
+        with self._lock:
+            entries = [entry for entry in periods.get(city, []) if entry["effective"] != period["effective"]]
+            entries.append(period)
+            entries.sort(key=lambda entry: entry["effective"])
+            periods[city] = entries
+            self._compiled.clear()
+            self.version += 1
+
+    def year_range(self) -> Tuple[int, int]:
+        """有政策数据的年度范围：(最早生效年度, 最新生效年度)"""
+        years = [entry["effective"][0] for entries in self._ensure_loaded().values() for entry in entries]
+        if not years:
+            raise ValueError("没有政策数据")
+        return min(years), max(years)
+
+    def reload(self):
+        """重新读取数据文件"""
+        with self._lock:
+            self._periods = None
+            self._compiled.clear()
+            self.version += 1
+        self._ensure_loaded()
+
+    def compile(self, year: Optional[int] = None) -> CompiledPolicy:
+        """编译（并缓存）指定年份的上限表；该年份早于某城市的最早生效年度时不含该城市，没有任何城市时抛出 ValueError"""
+        year = DEFAULT_POLICY_YEAR if year is None else year
+        compiled = self._compiled.get(year)
+        if compiled is not None:
+            return compiled
+
+        # 编译在锁外进行：先记下版本号，期间若 add_period / reload 改变了数据，编译结果不写入缓存
+        version = self.version
+        periods = self._ensure_loaded()
+        with self._lock:
+            periods = dict(periods)
+        cities = [city for city, entries in periods.items() if entries[0]["effective"][0] <= year]
+        if not cities:
+            first, _ = self.year_range()
+            raise ValueError(f"没有 {year} 年的政策数据（最早为 {first} 年）")
+        month_caps = []
+        for city in cities:
+            entries = periods[city]
+            row = []
+            for month in range(1, 13):
+                current = entries[0]
+                for entry in entries:
+                    if entry["effective"] <= (year, month):
+                        current = entry
+                    else:
+                        break
+                row.append(tuple(current[field] for field in CAP_FIELDS))
+            month_caps.append(tuple(row))
+        compiled = CompiledPolicy(year, cities, month_caps)
+        with self._lock:
+            if self.version == version:
+                self._compiled[year] = compiled
+        return compiled
+
+
+_REGISTRY = PolicyRegistry()
+
+
+def get_registry() -> PolicyRegistry:
+    return _REGISTRY
+
+
+def get_policy(year: Optional[int] = None) -> CompiledPolicy:
+    """指定年份（默认 DEFAULT_POLICY_YEAR）的已编译上限表"""
+    return _REGISTRY.compile(year)
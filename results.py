@@ -0,0 +1,175 @@
+import json
+import struct
+from collections.abc import Mapping
+from typing import Union, Sequence, Dict, Iterator, Optional
+import numpy as np
+from batch import (MONTHLY_FIELDS, ANNUAL_FIELDS, ArrayLike, round_cents, city_caps,
+                   monthly_details_arrays, _as_monthly_matrix, _as_row_vector)
+
+# ------------------- 紧凑结果（按列存储） -------------------
+# MonthlyResultSet 用若干 NumPy 数组保存 N 名员工的全年结果（每个字段一个 (N,12) 或 (N,) 数组），
+# 只保存未取整的原始值：取整在按列读取时才做，逐员工的 dict 视图（EmployeeResult）在访问时才生成。
+# save / load 使用简单的二进制列式文件：文件头（JSON）+ 64字节对齐的原始数组，可直接内存映射读取。
+
+_MAGIC = b"TAXCOL1\0"
+_ALIGN = 64
+
+# 年度汇总所需的第12个月累计值
+CUMULATIVE_FIELDS = ("cumulative_income", "cumulative_social_housing", "cumulative_housing_fund", "cumulative_tax")
+
+
+class EmployeeResult(Mapping):
+    """单名员工结果的只读视图，键与 calculate_monthly_details 的返回值相同（monthly / annual）"""
+
+    __slots__ = ("_results", "_row")
+
+    def __init__(self, results: "MonthlyResultSet", row: int):
+        self._results = results
+        self._row = row
+
+    def __getitem__(self, key: str):
+        if key == "monthly":
+            columns = {field: self._results.monthly(field, self._row).tolist() for field in MONTHLY_FIELDS}
+            return [{"month": month, **{field: columns[field][month-1] for field in MONTHLY_FIELDS}}
+                    for month in range(1, 13)]
+        if key == "annual":
+            return {field: float(self._results.annual(field, self._row)) for field in ANNUAL_FIELDS}
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("monthly", "annual"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def to_dict(self) -> Dict:
+        return {"monthly": self["monthly"], "annual": self["annual"]}
+
+
+class MonthlyResultSet:
+    """N 名员工全年结果（struct-of-arrays）"""
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        missing = [name for name in MONTHLY_FIELDS + CUMULATIVE_FIELDS if name not in columns]
+        if missing:
+            raise ValueError(f"缺少字段：{', '.join(missing)}")
+        self._columns = columns
+
+    @classmethod
+    def from_details(cls, details: Dict[str, np.ndarray]) -> "MonthlyResultSet":
+        """由 batch.monthly_details_arrays 的结果构建（不复制每月数组，累计值只保留第12个月）"""
+        columns = {field: details[field] for field in MONTHLY_FIELDS}
+        columns.update({field: details[field][:, -1].copy() for field in CUMULATIVE_FIELDS})
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self._columns["cumulative_income"])
+
+    def __getitem__(self, row: int) -> EmployeeResult:
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return EmployeeResult(self, row % len(self))
+
+    def __iter__(self) -> Iterator[EmployeeResult]:
+        return (EmployeeResult(self, row) for row in range(len(self)))
+
+    def raw(self, field: str) -> np.ndarray:
+        """未取整的原始列"""
+        return self._columns[field]
+
+    def monthly(self, field: str, rows: Union[int, slice, np.ndarray, None] = None) -> np.ndarray:
+        """每月字段（取整到分），形状 (N,12)；rows 可选取部分员工"""
+        if field not in MONTHLY_FIELDS:
+            raise KeyError(field)
+        column = self._columns[field]
+        return round_cents(column if rows is None else column[rows])
+
+    def annual(self, field: str, rows: Union[int, slice, np.ndarray, None] = None) -> np.ndarray:
+        """年度汇总字段（取整规则与 calculate_monthly_details 一致），形状 (N,)"""
+        if field not in ANNUAL_FIELDS:
+            raise KeyError(field)
+        select = (lambda column: column) if rows is None else (lambda column: column[rows])
+        income = select(self._columns["cumulative_income"])
+        if field == "total_pre_tax":
+            return round_cents(income)
+        if field == "total_tax":
+            return round_cents(select(self._columns["cumulative_tax"]))
+        housing_fund = round_cents(select(self._columns["cumulative_housing_fund"]))
+        if field == "total_housing_fund":
+            return housing_fund
+        takehome = round_cents(income - select(self._columns["cumulative_social_housing"])
+                               - select(self._columns["cumulative_tax"]))
+        if field == "total_takehome":
+            return takehome
+        return takehome + housing_fund * 2
+
+    def to_batch_dict(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """转为 calculate_monthly_details_batch 的返回格式"""
+        monthly = {"month": np.arange(1, 13)}
+        monthly.update({field: self.monthly(field) for field in MONTHLY_FIELDS})
+        return {"monthly": monthly, "annual": {field: self.annual(field) for field in ANNUAL_FIELDS}}
+
+    def save(self, path: str):
+        """写入二进制列式文件（每列按原始 float64 连续写出，不经中间格式转换）"""
+        names = list(MONTHLY_FIELDS + CUMULATIVE_FIELDS)
+        arrays = [np.ascontiguousarray(self._columns[name], dtype=np.float64) for name in names]
+        columns = []
+        offset = 0
+        for name, array in zip(names, arrays):
+            columns.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+            offset += (array.nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+        header = json.dumps({"rows": len(self), "columns": columns}).encode("utf-8")
+        data_start = (len(_MAGIC) + 8 + len(header) + _ALIGN - 1) // _ALIGN * _ALIGN
+
+        with open(path, "wb") as f:
+            f.write(_MAGIC + struct.pack("<Q", len(header)) + header)
+            f.write(b"\0" * (data_start - f.tell()))
+            for column, array in zip(columns, arrays):
+                if not array.size:  # 空列不占数据区（memoryview 无法转换含0的形状）
+                    continue
+                f.write(b"\0" * (data_start + column["offset"] - f.tell()))
+                f.write(memoryview(array).cast("B"))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MonthlyResultSet":
+        """读取 save 写出的文件；mmap=True 时各列为只读内存映射，不整体读入内存"""
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"不是有效的结果文件：{path}")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+        data_start = (len(_MAGIC) + 8 + header_len + _ALIGN - 1) // _ALIGN * _ALIGN
+
+        columns = {}
+        for column in header["columns"]:
+            dtype = np.dtype(column["dtype"])
+            shape = tuple(column["shape"])
+            if not all(shape):
+                columns[column["name"]] = np.empty(shape, dtype=dtype)  # 空列无法内存映射
+            elif mmap:
+                columns[column["name"]] = np.memmap(path, dtype=dtype, mode="r",
+                                                    offset=data_start + column["offset"], shape=shape)
+            else:
+                with open(path, "rb") as f:
+                    f.seek(data_start + column["offset"])
+                    columns[column["name"]] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        return cls(columns)
+
+
+def calculate_monthly_details_compact(
+    monthly_salaries: ArrayLike,
+    social_security_bases: ArrayLike,
+    cities: Union[str, Sequence[str]] = "北京",
+    five_insurance_rates: ArrayLike = 0.105,
+    housing_fund_rates: ArrayLike = 0.12,
+    year: Optional[int] = None
+) -> MonthlyResultSet:
+    """参数同 calculate_monthly_details_batch，返回紧凑的 MonthlyResultSet"""
+    salaries = _as_monthly_matrix(monthly_salaries, "月薪")
+    bases = _as_monthly_matrix(social_security_bases, "社保基数")
+    _as_row_vector(five_insurance_rates, "五险比例")
+    fund_rates = _as_row_vector(housing_fund_rates, "公积金比例")
+    details = monthly_details_arrays(salaries, bases, city_caps(cities, year), fund_rates)
+    return MonthlyResultSet.from_details(details)
@@ -0,0 +1,126 @@
+from typing import Union, Optional, Sequence
+import numpy as np
+from data import TAX_RATE_TABLE, MONTHLY_TAX_RATE_TABLE
+from batch import city_caps, bracket_lookup
+
+# ------------------- 税后反推税前（net -> gross） -------------------
+# 全年每月相同月薪 S 时，全年税后收入（calculate_monthly_details 的 total_takehome）
+#   = 12S - 五险一金(S) - 个税(12S - 60000 - 五险一金(S)) [+ 年终奖税后(bonus_months * S)]
+# 五险一金在各上限处、个税在各税率档处、年终奖在月度税率表各档处分段线性，
+# 先求出全部分段点及每段的斜率/截距，再逐段直接解一次方程，无需反复调用正向计算。
+
+_SOCIAL_RATES = (0.08, 0.02, 0.005)  # 养老、医疗、失业个人比例（与 core 一致）
+
+
+def _annual_caps(city: str, year: Optional[int]):
+    """城市上限 -> 四个 (12,) 数组：养老、医疗、失业上限及公积金基数上限"""
+    return [cap[0] for cap in city_caps(city, year)]
+
+
+def _social_housing_coeffs(salary: float, caps, base: Optional[float], housing_fund_rate: float):
+    """全年五险一金在 salary 所在分段内的线性系数 (a, b)：五险一金 = a*S + b"""
+    slope = 0.0
+    intercept = 0.0
+    for month in range(12):
+        month_base = salary if base is None else base
+        for rate, upper in zip(_SOCIAL_RATES, caps[:3]):
+            if base is None and month_base * rate < upper[month]:
+                slope += rate
+            else:
+                intercept += min(month_base * rate, upper[month])
+        housing_limit = caps[3][month]
+        if base is None and month_base < housing_limit:
+            slope += housing_fund_rate
+        else:
+            intercept += min(month_base, housing_limit) * housing_fund_rate
+    return slope, intercept
+
+
+def _net_segments(city: str, social_security_base: Optional[float], housing_fund_rate: float, bonus_months: float,
+                  year: Optional[int] = None):
+    """
+    全年税后收入关于月薪 S 的分段线性表示
+
+    返回：(下界, 上界, 斜率, 截距) 四个数组，按下界升序
+    """
+    caps = _annual_caps(city, year)
+    points = {0.0}
+    if social_security_base is None:  # 社保基数跟随月薪
+        for rate, upper in zip(_SOCIAL_RATES, caps[:3]):
+            points.update((upper / rate).tolist())
+        points.update(caps[3][np.isfinite(caps[3])].tolist())
+    if bonus_months > 0:
+        points.update(12 * limit / bonus_months for limit, _, _ in MONTHLY_TAX_RATE_TABLE if np.isfinite(limit))
+
+    # 在每个五险一金分段内补充个税税率档分段点
+    bounds = sorted(points) + [float('inf')]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        slope, intercept = _social_housing_coeffs(lo + min(1.0, (hi - lo) / 2), caps,
+                                                  social_security_base, housing_fund_rate)
+        for limit, _, _ in TAX_RATE_TABLE:
+            if np.isfinite(limit):
+                crossing = (limit + 60000 + intercept) / (12 - slope)
+                if lo < crossing < hi:
+                    points.add(crossing)
+
+    bounds = sorted(points) + [float('inf')]
+    lows = np.array(bounds[:-1])
+    highs = np.array(bounds[1:])
+    slopes = np.empty(len(lows))
+    intercepts = np.empty(len(lows))
+    for i, (lo, hi) in enumerate(zip(lows, highs)):
+        probe = lo + min(1.0, (hi - lo) / 2)  # 分段内部一点，用于确定所在档位
+        sh_slope, sh_intercept = _social_housing_coeffs(probe, caps, social_security_base, housing_fund_rate)
+        taxable = (12 - sh_slope) * probe - 60000 - sh_intercept
+        _, rate, deduction = bracket_lookup(np.array(taxable), TAX_RATE_TABLE)
+        # 工资部分：12S - (aS + b) - [r((12 - a)S - 60000 - b) - d]
+        slopes[i] = (12 - sh_slope) * (1 - rate)
+        intercepts[i] = -sh_intercept + rate * (60000 + sh_intercept) + deduction
+        if bonus_months > 0:
+            # 年终奖部分：B - (B*r - d)，B = bonus_months * S
+            _, bonus_rate, bonus_deduction = bracket_lookup(np.array(bonus_months * probe / 12), MONTHLY_TAX_RATE_TABLE)
+            slopes[i] += bonus_months * (1 - bonus_rate)
+            intercepts[i] += bonus_deduction
+    return lows, highs, slopes, intercepts
+
+
+def solve_gross_salary(
+    target_takehome: Union[float, Sequence[float], np.ndarray],
+    city: str = "北京",
+    period: str = "monthly",
+    social_security_base: Optional[float] = None,
+    housing_fund_rate: float = 0.12,
+    bonus_months: float = 0.0,
+    year: Optional[int] = None
+) -> Union[float, np.ndarray]:
+    """
+    由目标税后收入反推税前月薪（全年12个月月薪相同）
+
+    参数：
+        - target_takehome: 目标税后收入，单个数值或数组（批量求解）
+        - period: "monthly" 表示月均税后（全年税后/12），"annual" 表示全年税后
+        - social_security_base: 固定社保基数；None 表示社保基数等于月薪
+        - bonus_months: 年终奖月数（年终奖 = bonus_months × 月薪，按 calculate_year_end_bonus 单独计税并计入税后收入）
+        - year: 政策年度（默认 policy.DEFAULT_POLICY_YEAR）
+
+    返回：
+        - 满足目标的最小税前月薪（未取整）；目标无法达到时为 nan
+    """
+    if period not in ("monthly", "annual"):
+        raise ValueError("period 需为 monthly 或 annual")
+    if bonus_months < 0:
+        raise ValueError("年终奖月数不能为负数")
+
+    targets = np.asarray(target_takehome, dtype=np.float64)
+    annual_targets = targets * 12 if period == "monthly" else targets
+    lows, highs, slopes, intercepts = _net_segments(city, social_security_base, housing_fund_rate, bonus_months, year)
+
+    # 每个目标 × 每个分段求解，取落在分段内的最小解
+    with np.errstate(divide="ignore", invalid="ignore"):
+        candidates = (annual_targets[..., None] - intercepts) / slopes
+    tolerance = 1e-9 * np.maximum(np.abs(candidates), 1.0)
+    valid = (candidates >= lows - tolerance) & (candidates <= highs + tolerance)
+    candidates = np.where(valid, np.clip(candidates, lows, highs), np.inf)
+    gross = candidates.min(axis=-1)
+    gross = np.where(np.isfinite(gross), gross, np.nan)
+    return float(gross) if gross.ndim == 0 else gross
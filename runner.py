@@ -0,0 +1,226 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from core import calculate_monthly_details, calculate_year_end_bonus
+from parsing import is_number, parse_series, parse_rate
+
+# ------------------- 无界面批量计算（CSV / JSONL 流式处理） -------------------
+# 输入每行一名员工，字段名与 calculate_monthly_details 参数一致：
+#   id, monthly_salaries, social_security_bases, city, five_insurance_rate,
+#   housing_fund_rate, year_end_bonus
+# CSV 中 monthly_salaries / social_security_bases 可为单个数值或以 ";" 分隔的12个数值；
+# JSONL 中可为数值或12个元素的列表。比例为小数（0.12 表示12%），年终奖为0或缺省表示无年终奖。
+
+MONTHLY_COLUMNS = ["id", "month", "pre_tax_income", "pension", "medical", "unemployment",
+                   "housing_fund", "taxable_income", "current_tax", "takehome"]
+ANNUAL_COLUMNS = ["id", "city", "total_pre_tax", "total_housing_fund", "total_tax",
+                  "total_takehome", "total_takehome_with_housing",
+                  "year_end_bonus", "bonus_tax", "bonus_after_tax", "bonus_tax_rate"]
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _normalize_record(raw: Dict, line_no: int) -> Dict:
+    """原始记录 -> 计算参数（缺省值与 GUI 默认值一致）"""
+    try:
+        return _parse_record(raw, line_no)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"第{line_no}行数据格式错误：{e}") from e
+
+
+def _field(raw: Dict, name: str, default):
+    """字段缺失、为 None 或空字符串时取默认值（0 是有效值）"""
+    value = raw.get(name)
+    return default if value in (None, "") else value
+
+
+def _number(raw: Dict, name: str, default: float) -> float:
+    """数值字段（CSV 中为字符串）：需为有限数值"""
+    value = _field(raw, name, default)
+    if isinstance(value, str):
+        value = float(value)
+    if not is_number(value):
+        raise ValueError(f"{name} 需为有限数值")
+    return float(value)
+
+
+def _parse_record(raw: Dict, line_no: int) -> Dict:
+    salaries = parse_series(raw["monthly_salaries"], "月薪")
+    bases = raw.get("social_security_bases")
+    record_id = raw.get("id")
+    bonus = _number(raw, "year_end_bonus", 0)
+    if bonus < 0:
+        raise ValueError("年终奖金额不能为负数")
+    return {
+        "id": str(line_no) if record_id in (None, "") else record_id,
+        "monthly_salaries": salaries,
+        "social_security_bases": salaries if bases in (None, "") else parse_series(bases, "社保基数"),
+        "city": raw.get("city") or "北京",
+        "five_insurance_rate": parse_rate(_number(raw, "five_insurance_rate", 0.105), "five_insurance_rate"),
+        "housing_fund_rate": parse_rate(_number(raw, "housing_fund_rate", 0.12), "housing_fund_rate"),
+        "year_end_bonus": bonus,
+    }
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict]:
+    """逐行读取员工记录（生成器，不整体加载文件）"""
+    fmt = _detect_format(path, fmt)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+            for line_no, raw in enumerate(rows, start=1):
+                yield _normalize_record(raw, line_no)
+        else:
+            line_no = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                line_no += 1
+                yield _normalize_record(json.loads(line), line_no)
+
+
+def iter_chunks(records: Iterable[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """按 chunk_size 分块（生成器）"""
+    if chunk_size <= 0:
+        raise ValueError("分块大小必须大于0")
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_chunk(chunk: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """计算一个分块，返回 (每月明细行, 年度汇总行)"""
+    monthly_rows = []
+    annual_rows = []
+    for record in chunk:
+        try:
+            result = calculate_monthly_details(
+                monthly_salaries=record["monthly_salaries"],
+                social_security_bases=record["social_security_bases"],
+                city=record["city"],
+                five_insurance_rate=record["five_insurance_rate"],
+                housing_fund_rate=record["housing_fund_rate"]
+            )
+            bonus = record["year_end_bonus"]
+            bonus_result = calculate_year_end_bonus(bonus) if bonus > 0 else None
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"员工 {record['id']} 计算失败：{e}") from e
+
+        for data in result["monthly"]:
+            monthly_rows.append({"id": record["id"], **data})
+        annual_row = {"id": record["id"], "city": record["city"], **result["annual"],
+                      "year_end_bonus": bonus, "bonus_tax": "", "bonus_after_tax": "", "bonus_tax_rate": ""}
+        if bonus_result is not None:
+            annual_row.update(bonus_tax=bonus_result["tax"], bonus_after_tax=bonus_result["after_tax"],
+                              bonus_tax_rate=bonus_result["tax_rate"])
+        annual_rows.append(annual_row)
+    return monthly_rows, annual_rows
+
+
+class _RowWriter:
+    """CSV / JSONL 行写入器"""
+
+    def __init__(self, path: str, columns: List[str], fmt: Optional[str] = None):
+        self.fmt = _detect_format(path, fmt)
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.columns = columns
+        if self.fmt == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=columns)
+            self.writer.writeheader()
+
+    def write_rows(self, rows: List[Dict]):
+        if self.fmt == "csv":
+            self.writer.writerows(rows)
+        else:
+            self.file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # macOS 单位为字节，Linux 为KB
+
+
+def run(
+    input_path: str,
+    monthly_path: Optional[str],
+    annual_path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    流式计算：逐块读取 -> 计算 -> 写出，内存占用只与 chunk_size 有关
+
+    monthly_path 为 None 时不输出每月明细。返回处理行数、耗时、吞吐量与峰值内存。
+    """
+    start = time.perf_counter()
+    rows = 0
+    monthly_writer = _RowWriter(monthly_path, MONTHLY_COLUMNS, output_format) if monthly_path else None
+    annual_writer = _RowWriter(annual_path, ANNUAL_COLUMNS, output_format)
+    try:
+        for chunk in iter_chunks(read_records(input_path, input_format), chunk_size):
+            monthly_rows, annual_rows = process_chunk(chunk)
+            if monthly_writer is not None:
+                monthly_writer.write_rows(monthly_rows)
+            annual_writer.write_rows(annual_rows)
+            rows += len(chunk)
+    finally:
+        if monthly_writer is not None:
+            monthly_writer.close()
+        annual_writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量计算员工全年薪资明细（CSV / JSONL）")
+    parser.add_argument("input", help="输入文件（.csv 或 .jsonl）")
+    parser.add_argument("--annual-out", required=True, help="年度汇总输出文件")
+    parser.add_argument("--monthly-out", help="每月明细输出文件（可选）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每块行数")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="输入格式（默认按扩展名判断）")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="输出格式（默认按扩展名判断）")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = run(args.input, args.monthly_out, args.annual_out, args.chunk_size,
+                    args.input_format, args.output_format)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"计算失败：{e}", file=sys.stderr)
+        return 1
+
+    peak = f"{stats['peak_rss_mb']:.1f}MB" if stats["peak_rss_mb"] is not None else "未知"
+    print(f"处理 {stats['rows']} 行，耗时 {stats['seconds']}s，"
+          f"吞吐 {stats['rows_per_second']} 行/秒，峰值内存 {peak}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
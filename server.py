@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from typing import List, Dict, Tuple, Optional, Callable
+import numpy as np
+from batch import MONTHLY_FIELDS, ANNUAL_FIELDS, calculate_monthly_details_batch, calculate_year_end_bonus_batch
+from policy import get_policy, get_registry
+from parsing import is_number, parse_series, parse_rate
+
+# ------------------- HTTP 计算服务（asyncio，请求微批） -------------------
+# POST /monthly  {"monthly_salaries", "social_security_bases", "city", "five_insurance_rate", "housing_fund_rate", "year"}
+#                -> calculate_monthly_details 的完整结果
+# POST /annual   参数同上 -> 仅年度汇总
+# POST /bonus    {"year_end_bonus"} -> calculate_year_end_bonus 的结果
+# GET  /stats    -> 请求数、拒绝数、批次大小、p50/p99 延迟
+# 并发请求先进入有界队列，按 max_batch_size / max_wait_ms 凑成一批后调用一次向量化计算；
+# 队列满时直接返回 503（背压）。
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_MAX_PENDING = 10000
+MAX_BODY_BYTES = 64 * 1024
+MAX_AMOUNT = 1e12  # 单个金额上限，避免累计值溢出为 inf
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    """等待队列已满"""
+
+
+def _is_amount(value) -> bool:
+    """有限且不超过 MAX_AMOUNT 的数值（排除 bool、NaN、Infinity）"""
+    return is_number(value) and abs(value) <= MAX_AMOUNT
+
+
+def _parse_series(value, name: str) -> List[float]:
+    """单个数值 / 12个数值 -> 12个 float 的列表（批量计算按 (N,12) 组装）"""
+    series = parse_series(value, name, MAX_AMOUNT)
+    return series if isinstance(series, list) else [series] * 12
+
+
+def _parse_monthly_request(payload: Dict) -> Dict:
+    """校验并标准化月度计算请求（逐个请求校验，避免一条坏数据拖垮整批）"""
+    if "monthly_salaries" not in payload:
+        raise ValueError("缺少 monthly_salaries")
+    salaries = _parse_series(payload["monthly_salaries"], "月薪")
+    bases = _parse_series(payload.get("social_security_bases", payload["monthly_salaries"]), "社保基数")
+    city = payload.get("city", "北京")
+    year = payload.get("year")
+    if year is not None:
+        if not isinstance(year, int) or isinstance(year, bool):
+            raise ValueError("year 需为整数")
+        # 只接受有政策数据的年度，避免任意年份都被编译并常驻缓存
+        first, last = get_registry().year_range()
+        if not first <= year <= last:
+            raise ValueError(f"year 需在 {first}-{last} 之间")
+    if city not in get_policy(year).index:
+        raise ValueError(f"不支持的城市：{city}")
+    return {
+        "monthly_salaries": salaries,
+        "social_security_bases": bases,
+        "city": city,
+        "five_insurance_rate": parse_rate(payload.get("five_insurance_rate", 0.105), "five_insurance_rate"),
+        "housing_fund_rate": parse_rate(payload.get("housing_fund_rate", 0.12), "housing_fund_rate"),
+        "year": year,
+    }
+
+
+def _parse_bonus_request(payload: Dict) -> float:
+    bonus = payload.get("year_end_bonus")
+    if not _is_amount(bonus):
+        raise ValueError("year_end_bonus 需为有限数值")
+    if bonus <= 0:
+        raise ValueError("年终奖金额必须大于0")
+    return float(bonus)
+
+
+def compute_monthly_batch(requests: List[Dict]) -> List[Dict]:
+    """一批月度请求 -> 逐个结果（按政策年度分组，每组一次向量化调用）"""
+    results: List[Optional[Dict]] = [None] * len(requests)
+    groups: Dict[Optional[int], List[int]] = {}
+    for i, request in enumerate(requests):
+        groups.setdefault(request["year"], []).append(i)
+
+    for year, rows in groups.items():
+        batch = calculate_monthly_details_batch(
+            np.array([requests[i]["monthly_salaries"] for i in rows]),
+            np.array([requests[i]["social_security_bases"] for i in rows]),
+            [requests[i]["city"] for i in rows],
+            np.array([requests[i]["five_insurance_rate"] for i in rows]),
+            np.array([requests[i]["housing_fund_rate"] for i in rows]),
+            year
+        )
+        monthly_columns = {field: batch["monthly"][field].tolist() for field in MONTHLY_FIELDS}
+        annual_columns = {field: batch["annual"][field].tolist() for field in ANNUAL_FIELDS}
+        for j, i in enumerate(rows):
+            monthly = [{"month": month, **{field: monthly_columns[field][j][month-1] for field in MONTHLY_FIELDS}}
+                       for month in range(1, 13)]
+            results[i] = {"monthly": monthly, "annual": {field: annual_columns[field][j] for field in ANNUAL_FIELDS}}
+    return results
+
+
+def compute_bonus_batch(bonuses: List[float]) -> List[Dict]:
+    batch = calculate_year_end_bonus_batch(np.array(bonuses))
+    columns = {key: values.tolist() for key, values in batch.items()}
+    return [{key: columns[key][i] for key in columns} for i in range(len(bonuses))]
+
+
+class MicroBatcher:
+    """把并发提交的请求凑批，交给 compute(list) -> list 一次计算"""
+
+    def __init__(self, compute: Callable[[List], List], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, max_pending: int = DEFAULT_MAX_PENDING):
+        if max_batch_size <= 0 or max_pending <= 0:
+            raise ValueError("批大小与队列长度必须大于0")
+        self.compute = compute
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: "asyncio.Queue[Tuple[object, asyncio.Future]]" = asyncio.Queue(maxsize=max_pending)
+        self.batches = 0
+        self.batched_items = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise Overloaded() from None
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                # 计算放到线程池，事件循环继续接收请求
+                results = await loop.run_in_executor(None, self.compute, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self.batches += 1
+            self.batched_items += len(batch)
+
+
+class LatencyTracker:
+    """保留最近 window 个请求的延迟，用于 p50/p99"""
+
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": self.count, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        p50, p99 = np.percentile(np.fromiter(self.samples, dtype=np.float64), [50, 99])
+        return {"count": self.count, "p50_ms": round(p50 * 1000, 3), "p99_ms": round(p99 * 1000, 3),
+                "max_ms": round(max(self.samples) * 1000, 3)}
+
+
+class CalculationServer:
+    def __init__(self, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.options = (max_batch_size, max_wait_ms, max_pending)
+        self.monthly_batcher: Optional[MicroBatcher] = None
+        self.bonus_batcher: Optional[MicroBatcher] = None
+        self.latency = {"/monthly": LatencyTracker(), "/annual": LatencyTracker(), "/bonus": LatencyTracker()}
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        self.monthly_batcher = MicroBatcher(compute_monthly_batch, *self.options)
+        self.bonus_batcher = MicroBatcher(compute_bonus_batch, *self.options)
+        self.monthly_batcher.start()
+        self.bonus_batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.monthly_batcher.stop()
+        await self.bonus_batcher.stop()
+
+    def stats(self) -> Dict:
+        batchers = {"monthly": self.monthly_batcher, "bonus": self.bonus_batcher}
+        return {
+            "rejected": self.rejected,
+            "latency": {path: tracker.summary() for path, tracker in self.latency.items()},
+            "batches": {name: {"batches": b.batches, "pending": b.queue.qsize(),
+                               "avg_batch_size": round(b.batched_items / b.batches, 2) if b.batches else 0.0}
+                        for name, b in batchers.items()},
+        }
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if path == "/stats":
+            return (200, self.stats()) if method == "GET" else (405, {"error": "仅支持 GET"})
+        if path not in self.latency:
+            return 404, {"error": f"未知路径：{path}"}
+        if method != "POST":
+            return 405, {"error": "仅支持 POST"}
+
+        start = time.perf_counter()
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("请求体需为 JSON 对象")
+            if path == "/bonus":
+                result = await self.bonus_batcher.submit(_parse_bonus_request(payload))
+            else:
+                result = await self.monthly_batcher.submit(_parse_monthly_request(payload))
+                if path == "/annual":
+                    result = result["annual"]
+        except Overloaded:
+            self.rejected += 1
+            return 503, {"error": "服务繁忙，请稍后重试"}
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"未知错误：{e}"}
+        self.latency[path].record(time.perf_counter() - start)
+        return 200, result
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    break
+                if length > MAX_BODY_BYTES:
+                    status, result = 413, {"error": "请求体过大"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, result = await self._dispatch(method.upper(), target.split("?", 1)[0], body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+
+                try:
+                    payload = json.dumps(result, ensure_ascii=False, allow_nan=False).encode("utf-8")
+                except ValueError:
+                    status = 500
+                    payload = json.dumps({"error": "结果包含非有限数值"}, ensure_ascii=False).encode("utf-8")
+                head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                        f"Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+                if status == 503:
+                    head += "Retry-After: 1\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, max_batch_size: int, max_wait_ms: float, max_pending: int):
+    server = CalculationServer(max_batch_size, max_wait_ms, max_pending)
+    listener = await server.start(host, port)
+    print(f"服务已启动：http://{host}:{port}", file=sys.stderr)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="薪资/个税计算 HTTP 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="每批最多请求数")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="凑批最长等待（毫秒）")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="等待队列上限，超出返回503")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import json
+import os
+from typing import Dict, Tuple, Optional, Sequence, Union
+import numpy as np
+from data import TAX_RATE_TABLE
+from batch import ArrayLike, bracket_lookup, round_cents, city_caps, calculate_year_end_bonus_batch
+
+# ------------------- 参数网格扫描（薪酬规划） -------------------
+# 对 月薪 × 城市 × 公积金比例 × 年终奖 的笛卡尔积一次性向量化计算全年汇总，
+# 结果为带坐标标签的4维数组（每个字段一个数组，形状 (月薪数, 城市数, 比例数, 年终奖数)）。
+# 不随某一维变化的部分只算一次再广播：
+#   - 社保（养老/医疗/失业）只与 月薪 × 城市 有关，与公积金比例、年终奖无关
+#   - 累计税前收入只与月薪有关；年终奖个税只与年终奖有关（按1维计算）
+#   - 全年个税只取决于第12个月的累计值，按月顺序累加（与标量版相同的加法顺序），不保存逐月数组
+# 网格过大时可指定 out_dir：按月薪分块计算，各字段直接写入 out_dir/<字段>.npy（内存映射）。
+
+AXES = ("salary", "city", "housing_fund_rate", "year_end_bonus")
+SWEEP_FIELDS = ("total_pre_tax", "total_housing_fund", "total_tax", "total_takehome",
+                "total_takehome_with_housing", "bonus_tax", "bonus_after_tax",
+                "takehome_with_bonus", "takehome_with_bonus_and_housing")
+
+DEFAULT_CHUNK_SIZE = 256  # 每块月薪个数
+
+
+class SweepResult:
+    """网格扫描结果：axes 为各维坐标，values 为 字段 -> 4维数组"""
+
+    def __init__(self, axes: Dict[str, np.ndarray], values: Dict[str, np.ndarray]):
+        self.axes = axes
+        self.values = values
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(self.axes[axis]) for axis in AXES)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.values[field]
+
+    def _position(self, axis: str, label) -> int:
+        matches = np.flatnonzero(self.axes[axis] == label)
+        if not len(matches):
+            raise KeyError(f"{axis} 中没有 {label}")
+        return int(matches[0])
+
+    def sel(self, field: str, **labels) -> np.ndarray:
+        """按坐标取值，如 sel("total_takehome", city="上海", salary=30000)；未指定的维保留"""
+        unknown = set(labels) - set(AXES)
+        if unknown:
+            raise KeyError(f"未知维度：{', '.join(sorted(unknown))}")
+        index = tuple(self._position(axis, labels[axis]) if axis in labels else slice(None) for axis in AXES)
+        return self.values[field][index]
+
+    @classmethod
+    def load(cls, out_dir: str, mmap: bool = True) -> "SweepResult":
+        """读取 sweep(out_dir=...) 写出的结果；mmap=True 时各字段为只读内存映射"""
+        with open(os.path.join(out_dir, "axes.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        axes = {axis: np.asarray(meta["axes"][axis], dtype=object if axis == "city" else np.float64)
+                for axis in AXES}
+        values = {field: np.load(os.path.join(out_dir, f"{field}.npy"), mmap_mode="r" if mmap else None)
+                  for field in meta["fields"]}
+        return cls(axes, values)
+
+
+def _as_axis(values: ArrayLike, name: str) -> np.ndarray:
+    arr = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    if arr.ndim != 1 or not len(arr):
+        raise ValueError(f"{name}需为单个数值或非空的一维序列")
+    return arr
+
+
+def _annual_block(
+    salaries: np.ndarray,
+    bases: np.ndarray,
+    caps: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    fund_rates: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    一块月薪的全年汇总（未广播到年终奖维）
+
+    salaries / bases 形状 (S,1,1)，各上限 (1,C,1,12)，fund_rates (1,1,F)；
+    返回的数组可广播到 (S,C,F)，逐项与 core.calculate_monthly_details 的年度汇总一致。
+    """
+    pension_upper, medical_upper, unemployment_upper, housing_limit = caps
+    cumulative_income = np.zeros_like(salaries)
+    cumulative_social_housing = 0.0
+    cumulative_housing_fund = 0.0
+    for month in range(12):
+        # 社保只与 月薪 × 城市 有关，公积金再乘比例维；加法顺序同标量版
+        social_total = (np.minimum(bases * 0.08, pension_upper[..., month])
+                        + np.minimum(bases * 0.02, medical_upper[..., month])
+                        + np.minimum(bases * 0.005, unemployment_upper[..., month]))
+        housing_fund = np.minimum(bases, housing_limit[..., month]) * fund_rates
+        cumulative_income = cumulative_income + salaries
+        cumulative_social_housing = cumulative_social_housing + (social_total + housing_fund)
+        cumulative_housing_fund = cumulative_housing_fund + housing_fund
+
+    taxable_income = cumulative_income - 5000 * 12.0 - cumulative_social_housing
+    _, rate, deduction = bracket_lookup(taxable_income, TAX_RATE_TABLE)
+    cumulative_tax = taxable_income * rate - deduction
+
+    total_housing_fund = round_cents(cumulative_housing_fund)
+    total_takehome = round_cents(cumulative_income - cumulative_social_housing - cumulative_tax)
+    return {
+        "total_pre_tax": round_cents(cumulative_income),
+        "total_housing_fund": total_housing_fund,
+        "total_tax": round_cents(cumulative_tax),
+        "total_takehome": total_takehome,
+        "total_takehome_with_housing": total_takehome + total_housing_fund * 2,
+    }
+
+
+def sweep(
+    salaries: ArrayLike,
+    cities: Union[str, Sequence[str]],
+    housing_fund_rates: ArrayLike = 0.12,
+    year_end_bonuses: ArrayLike = 0.0,
+    social_security_bases: Optional[float] = None,
+    year: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    out_dir: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> SweepResult:
+    """
+    计算 月薪 × 城市 × 公积金比例 × 年终奖 网格上的全年汇总
+
+    参数：
+        - salaries: 税前月薪坐标（全年12个月相同）
+        - social_security_bases: 社保基数；None 表示与月薪相同，数值表示所有网格点使用同一基数
+        - year_end_bonuses: 年终奖坐标，0 表示无年终奖（年终奖个税、税后均为0）
+        - fields: 需要的字段（默认 SWEEP_FIELDS 全部）
+        - out_dir: 指定时结果写入该目录下的 .npy 文件（逐块写入，不在内存中保存整个网格）
+    返回：SweepResult，字段 takehome_with_bonus = 全年税后 + 年终奖税后，
+          takehome_with_bonus_and_housing 再加双边公积金（与界面中的合计口径一致）
+    """
+    salary_axis = _as_axis(salaries, "月薪")
+    city_axis = np.array([cities] if isinstance(cities, str) else list(cities), dtype=object)
+    rate_axis = _as_axis(housing_fund_rates, "公积金比例")
+    bonus_axis = _as_axis(year_end_bonuses, "年终奖")
+    if not len(city_axis):
+        raise ValueError("城市不能为空")
+    if np.any(bonus_axis < 0):
+        raise ValueError("年终奖金额不能为负数")
+    if chunk_size <= 0:
+        raise ValueError("块大小必须大于0")
+    fields = list(SWEEP_FIELDS if fields is None else fields)
+    unknown = [field for field in fields if field not in SWEEP_FIELDS]
+    if unknown:
+        raise ValueError(f"未知字段：{', '.join(unknown)}")
+    axes = {"salary": salary_axis, "city": city_axis, "housing_fund_rate": rate_axis, "year_end_bonus": bonus_axis}
+    shape = tuple(len(axes[axis]) for axis in AXES)
+
+    # 只与年终奖有关的部分：按1维计算
+    bonus_tax = np.zeros(len(bonus_axis))
+    bonus_after_tax = np.zeros(len(bonus_axis))
+    has_bonus = bonus_axis > 0
+    if has_bonus.any():
+        bonus_result = calculate_year_end_bonus_batch(bonus_axis[has_bonus])
+        bonus_tax[has_bonus] = bonus_result["tax"]
+        bonus_after_tax[has_bonus] = bonus_result["after_tax"]
+
+    # 只与城市有关的部分：上限表 (1,C,1,12)
+    caps = tuple(cap[None, :, None, :] for cap in city_caps(list(city_axis), year))
+    fund_rates = rate_axis[None, None, :]
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        values = {field: np.lib.format.open_memmap(os.path.join(out_dir, f"{field}.npy"), mode="w+",
+                                                   dtype=np.float64, shape=shape) for field in fields}
+    else:
+        values = {field: np.empty(shape, dtype=np.float64) for field in fields}
+
+    for start in range(0, len(salary_axis), chunk_size):
+        block = slice(start, start + chunk_size)
+        block_salaries = salary_axis[block][:, None, None]
+        bases = block_salaries if social_security_bases is None else np.full_like(block_salaries, social_security_bases)
+        annual = _annual_block(block_salaries, bases, caps, fund_rates)
+        annual["bonus_tax"] = bonus_tax
+        annual["bonus_after_tax"] = bonus_after_tax
+        annual["takehome_with_bonus"] = annual["total_takehome"][..., None] + bonus_after_tax
+        annual["takehome_with_bonus_and_housing"] = (annual["takehome_with_bonus"]
+                                                     + annual["total_housing_fund"][..., None] * 2)
+        for field in fields:
+            column = annual[field]
+            if field not in ("bonus_tax", "bonus_after_tax", "takehome_with_bonus", "takehome_with_bonus_and_housing"):
+                column = column[..., None]  # 与年终奖无关的字段广播到年终奖维
+            values[field][block] = column
+
+    if out_dir is not None:
+        for array in values.values():
+            array.flush()
+        with open(os.path.join(out_dir, "axes.json"), "w", encoding="utf-8") as f:
+            json.dump({"axes": {axis: axes[axis].tolist() for axis in AXES}, "fields": fields},
+                      f, ensure_ascii=False)
+        return SweepResult.load(out_dir)
+    return SweepResult(axes, values)
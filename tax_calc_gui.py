@@ -1,8 +1,78 @@
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-from data import CITY_SOCIAL_UPPER_LIMITS
+from tkinter import ttk, messagebox, filedialog
+from typing import List, Dict, Tuple, Callable, Optional
+from policy import get_registry
 from core import calculate_monthly_details, calculate_year_end_bonus
 
+# ------------------- 界面刷新参数 -------------------
+# 计算在后台线程进行，结果放入队列，由 Tk 主线程通过 root.after 轮询取回并刷新界面
+DEBOUNCE_MS = 300       # 输入停止变化多久后自动重算
+POLL_MS = 30            # 轮询后台结果的间隔
+ROW_HEIGHT = 20         # Treeview 行高（像素），用于估算可见行数
+
+MONTHLY_TREE_COLUMNS = [
+    ("month", "月份", 50), ("pre_tax_income", "税前收入（元）", 80), ("pension", "养老保险（元）", 80),
+    ("medical", "医疗保险（元）", 80), ("unemployment", "失业保险（元）", 80), ("housing_fund", "公积金（元）", 80),
+    ("taxable_income", "累计应纳税所得额（元）", 140), ("current_tax", "当月个税（元）", 80), ("takehome", "当月税后收入（元）", 80)
+]
+BATCH_TREE_COLUMNS = [
+    ("id", "员工", 80), ("city", "城市", 60), ("total_pre_tax", "全年税前收入（元）", 110),
+    ("total_housing_fund", "全年公积金（元）", 100), ("total_tax", "全年个税（元）", 100),
+    ("total_takehome", "全年税后收入（元）", 110), ("total_takehome_with_housing", "税后收入含公积金（元）", 130),
+    ("bonus_tax", "年终奖个税（元）", 100), ("bonus_after_tax", "年终奖税后（元）", 100)
+]
+
+
+def compute_single(params: Dict) -> Tuple[Dict, Dict]:
+    """单人计算（在后台线程执行，不访问任何 Tk 控件）"""
+    result = calculate_monthly_details(
+        monthly_salaries=params["salary"],
+        social_security_bases=params["social_base"],
+        city=params["city"],
+        five_insurance_rate=params["insurance_rate"],
+        housing_fund_rate=params["fund_rate"]
+    )
+    bonus_result = calculate_year_end_bonus(params["year_end_bonus"]) if params["year_end_bonus"] > 0 else None
+    return result, bonus_result
+
+
+def compute_batch(path: str) -> Tuple[List[str], List[str], Dict]:
+    """读取工资表文件并批量计算（在后台线程执行），返回 (员工id, 城市, 各列数组)"""
+    import numpy as np
+    from runner import read_records
+    from batch import ANNUAL_FIELDS, calculate_year_end_bonus_batch
+    from results import calculate_monthly_details_compact
+
+    records = list(read_records(path))
+    if not records:
+        raise ValueError("文件中没有员工记录")
+
+    def twelve(values):
+        return values if isinstance(values, list) else [values] * 12
+
+    cities = [record["city"] for record in records]
+    result_set = calculate_monthly_details_compact(
+        np.array([twelve(record["monthly_salaries"]) for record in records]),
+        np.array([twelve(record["social_security_bases"]) for record in records]),
+        cities,
+        np.array([record["five_insurance_rate"] for record in records]),
+        np.array([record["housing_fund_rate"] for record in records])
+    )
+    columns = {field: result_set.annual(field) for field in ANNUAL_FIELDS}
+
+    bonuses = np.array([record["year_end_bonus"] for record in records])
+    has_bonus = bonuses > 0
+    columns["bonus_tax"] = np.zeros(len(records))
+    columns["bonus_after_tax"] = np.zeros(len(records))
+    if has_bonus.any():
+        bonus_result = calculate_year_end_bonus_batch(bonuses[has_bonus])
+        columns["bonus_tax"][has_bonus] = bonus_result["tax"]
+        columns["bonus_after_tax"][has_bonus] = bonus_result["after_tax"]
+    return [str(record["id"]) for record in records], cities, columns
+
 
 class TaxCalculatorGUI:
     def __init__(self, root):
@@ -10,10 +80,27 @@ class TaxCalculatorGUI:
         self.root.title("中国薪资明细计算器")
         self.root.geometry("1200x800")  # 调整宽度
         self.root.resizable(True, True)
+
+        # 后台计算：每次提交递增代号，只显示最新一次提交的结果（旧结果直接丢弃）；
+        # 批量计算进行中不做输入变化触发的自动重算，避免按键把批量结果作废
+        self._results = queue.Queue()
+        self._generation = 0
+        self._pending = 0
+        self._pending_batches = 0
+        self._last_params: Optional[Dict] = None  # 最近一次提交的单人参数；按键未改变输入值时不重算
+        self._debounce_id = None
+
+        # 批量模式：全部结果保存在数组中，Treeview 只插入可见的若干行
+        self._tree_mode = "monthly"
+        self._batch_ids: List[str] = []
+        self._batch_cities: List[str] = []
+        self._batch_columns: Dict = {}
+        self._batch_offset = 0
         
         self._init_styles()
         self._create_input_panel()
         self._create_result_area()
+        self._bind_live_recompute()
 
 
     def _init_styles(self):
@@ -41,7 +128,7 @@ class TaxCalculatorGUI:
         ttk.Label(input_frame, text="所在城市：").grid(row=0, column=4, sticky=tk.W, padx=5, pady=5)
         self.city_combo = ttk.Combobox(
             input_frame,
-            values=list(CITY_SOCIAL_UPPER_LIMITS.keys()),
+            values=get_registry().cities(),
             state="readonly",
             width=20
         )
@@ -64,14 +151,28 @@ class TaxCalculatorGUI:
         self.year_end_bonus_entry.grid(row=1, column=5, sticky=tk.W, padx=5, pady=5)
         self.year_end_bonus_entry.insert(0, "100000")
         
-        # 计算按钮（row=2，跨所有列居中）
+        # 计算按钮与批量导入（row=2，跨所有列居中）
+        button_frame = ttk.Frame(input_frame)
+        button_frame.grid(row=2, column=0, columnspan=6, pady=10)
         self.calc_btn = ttk.Button(
-            input_frame,
+            button_frame,
             text="计算全年薪资明细",
             command=self._calculate_and_display,
             style="Accent.TButton"
         )
-        self.calc_btn.grid(row=2, column=0, columnspan=6, pady=10)
+        self.calc_btn.pack(side=tk.LEFT, padx=10)
+        self.batch_btn = ttk.Button(button_frame, text="批量导入工资表", command=self._load_batch_file)
+        self.batch_btn.pack(side=tk.LEFT, padx=10)
+        self.status_label = ttk.Label(button_frame, text="")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+
+    def _bind_live_recompute(self):
+        """输入变化后防抖自动重算"""
+        for entry in (self.salary_entry, self.social_base_entry, self.insurance_rate_entry,
+                      self.fund_rate_entry, self.year_end_bonus_entry):
+            entry.bind("<KeyRelease>", self._schedule_recompute)
+        self.city_combo.bind("<<ComboboxSelected>>", self._schedule_recompute)
 
 
     def _create_result_area(self):
@@ -87,29 +188,43 @@ class TaxCalculatorGUI:
         table_frame = ttk.Frame(parent)
         table_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
-        scrollbar = ttk.Scrollbar(table_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_scrollbar = ttk.Scrollbar(table_frame, command=self._on_tree_scroll)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         self.result_tree = ttk.Treeview(
             table_frame,
-            columns=("month", "pre_tax_income", "pension", "medical", "unemployment", "housing_fund", "taxable_income", "current_tax", "takehome"),
             show="headings",
-            yscrollcommand=scrollbar.set,
+            yscrollcommand=self.tree_scrollbar.set,
             height=12
         )
+        self._set_tree_columns(MONTHLY_TREE_COLUMNS)
         
-        column_setup = [
-            ("month", "月份", 50), ("pre_tax_income", "税前收入（元）", 80), ("pension", "养老保险（元）", 80),
-            ("medical", "医疗保险（元）", 80), ("unemployment", "失业保险（元）", 80), ("housing_fund", "公积金（元）", 80),
-            ("taxable_income", "累计应纳税所得额（元）", 140), ("current_tax", "当月个税（元）", 80), ("takehome", "当月税后收入（元）", 80)
-        ]
-        
+        self.result_tree.pack(fill=tk.BOTH, expand=True)
+        self.result_tree.bind("<Configure>", lambda event: self._render_batch_window())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.result_tree.bind(sequence, self._on_tree_wheel)
+
+
+    def _set_tree_columns(self, column_setup):
+        self.result_tree.delete(*self.result_tree.get_children())
+        self.result_tree["columns"] = [col_id for col_id, _, _ in column_setup]
         for col_id, col_text, col_width in column_setup:
             self.result_tree.heading(col_id, text=col_text)
             self.result_tree.column(col_id, width=col_width, anchor=tk.CENTER)
-        
-        self.result_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.result_tree.yview)
+
+
+    def _set_tree_mode(self, mode: str):
+        """切换表格为单人月度明细（monthly）或批量员工列表（batch）"""
+        if mode == self._tree_mode:
+            return
+        self._tree_mode = mode
+        if mode == "batch":
+            self._set_tree_columns(BATCH_TREE_COLUMNS)
+            self.result_tree.configure(yscrollcommand="")  # 批量模式由 _render_batch_window 设置滚动条
+        else:
+            self._batch_ids, self._batch_cities, self._batch_columns = [], [], {}
+            self._set_tree_columns(MONTHLY_TREE_COLUMNS)
+            self.result_tree.configure(yscrollcommand=self.tree_scrollbar.set)
 
 
     def _create_annual_summary(self, parent):
@@ -199,69 +314,225 @@ class TaxCalculatorGUI:
         self.lbl_total_combined.grid(row=1, column=2, padx=20, sticky=tk.W)
 
 
-    def _calculate_and_display(self):
+    # ------------------- 后台计算 -------------------
+    def _submit(self, compute: Callable, args: Tuple, on_done: Callable, on_error: Callable, batch: bool = False):
+        """在后台线程执行 compute(*args)，完成后在主线程调用 on_done(结果) 或 on_error(异常)"""
+        self._generation += 1
+        generation = self._generation
+
+        def worker():
+            try:
+                self._results.put((generation, batch, on_done, compute(*args)))
+            except Exception as e:
+                self._results.put((generation, batch, on_error, e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self._pending += 1
+        self._pending_batches += batch
+        if self._pending == 1:
+            self.root.after(POLL_MS, self._poll_results)
+
+
+    def _poll_results(self):
+        while True:
+            try:
+                generation, batch, callback, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            self._pending_batches -= batch
+            if generation == self._generation:  # 期间又提交过新的计算，旧结果不再显示
+                callback(payload)
+        if self._pending > 0:
+            self.root.after(POLL_MS, self._poll_results)
+
+
+    def _schedule_recompute(self, event=None):
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(DEBOUNCE_MS, self._live_recompute)
+
+
+    def _live_recompute(self):
+        """输入变化触发的自动重算：输入不完整时只在状态栏提示，不弹窗"""
+        self._debounce_id = None
+        if self._pending_batches:
+            return
         try:
-            salary = float(self.salary_entry.get())
-            social_base = float(self.social_base_entry.get())
-            city = self.city_combo.get()
-            insurance_rate = float(self.insurance_rate_entry.get()) / 100
-            fund_rate = float(self.fund_rate_entry.get()) / 100
-            year_end_bonus = float(self.year_end_bonus_entry.get())
-            
-            if salary <= 0 or social_base <= 0:
-                raise ValueError("税前月薪/社保基数必须大于0")
-            if not (0 < insurance_rate < 1) or not (0 < fund_rate < 1):
-                raise ValueError("比例需在0-100%之间")
-            if not city:
-                raise ValueError("请选择所在城市")
-            if year_end_bonus < 0:
-                raise ValueError("年终奖金额不能为负数")
-            
-            result = calculate_monthly_details(
-                monthly_salaries=salary,
-                social_security_bases=social_base,
-                city=city,
-                five_insurance_rate=insurance_rate,
-                housing_fund_rate=fund_rate
-            )
-            monthly_data = result["monthly"]
-            annual_summary = result["annual"]
-            
-            self.result_tree.delete(*self.result_tree.get_children())
-            for data in monthly_data:
-                self.result_tree.insert("", tk.END, values=(
-                    data["month"], data["pre_tax_income"], data["pension"], data["medical"],
-                    data["unemployment"], data["housing_fund"], data["taxable_income"],
-                    data["current_tax"], data["takehome"]
-                ))
-            
-            # 更新年度汇总标签（关键：从annual_summary取数据）
-            self.summary_labels["total_pre_tax"].config(text=f"全年税前收入：{annual_summary['total_pre_tax']:.2f}元")
-            self.summary_labels["total_tax"].config(text=f"全年个税合计：{annual_summary['total_tax']:.2f}元")
-            self.summary_labels["total_housing_fund"].config(text=f"全年双边公积金合计：{2*annual_summary['total_housing_fund']:.2f}元")
-            self.summary_labels["total_takehome"].config(text=f"全年税后收入：{annual_summary['total_takehome']:.2f}元")
-            self.summary_labels["total_takehome_with_housing"].config(text=f"全年税后收入（含公积金）：{annual_summary['total_takehome_with_housing']:.2f}元")
-            
-            # 更新年终奖区域（保持不变）
-            if year_end_bonus > 0:
-                bonus_result = calculate_year_end_bonus(year_end_bonus)
-                self.lbl_bonus_amount.config(text=f"年终奖金额：{year_end_bonus:.2f}元")
-                self.lbl_bonus_tax.config(text=f"年终奖个税：{bonus_result['tax']:.2f}元")
-                self.lbl_bonus_rate.config(text=f"适用税率：{bonus_result['tax_rate']}%")
-                self.lbl_bonus_after_tax.config(text=f"年终奖税后：{bonus_result['after_tax']:.2f}元")
-                total_annual_takehome = annual_summary['total_takehome']
-                total_bonus_after_tax = bonus_result['after_tax']
-                total_housing_double = annual_summary['total_housing_fund'] * 2
-                total_cash_bonus = total_annual_takehome + total_bonus_after_tax
-                total_combined = total_cash_bonus + total_housing_double
-            else:
-                total_cash_bonus = annual_summary['total_takehome']
-                total_combined = total_cash_bonus + annual_summary['total_housing_fund'] * 2
-            
-            self.lbl_total_cash_bonus.config(text=f"税后现金+年终奖：{total_cash_bonus:.2f}元")
-            self.lbl_total_combined.config(text=f"税后现金+年终奖+双边公积金：{total_combined:.2f}元")
+            params = self._read_inputs()
+        except ValueError as e:
+            self.status_label.config(text=f"输入错误：{e}")
+            return
+        if params == self._last_params:  # Tab、方向键等未改变输入，保留当前结果（含已导入的批量表格）
+            return
+        self._last_params = params
+        self._submit(compute_single, (params,), lambda payload: self._display_single(params, payload),
+                     self._show_live_error)
+
+
+    def _show_live_error(self, error: Exception):
+        self.status_label.config(text=f"计算失败：{error}")
+
+
+    def _show_error(self, error: Exception):
+        self.status_label.config(text="")
+        if isinstance(error, (ValueError, KeyError)):
+            messagebox.showerror("输入错误", str(error), parent=self.root)
+        else:
+            messagebox.showerror("计算失败", f"未知错误：{str(error)}", parent=self.root)
+
+
+    def _read_inputs(self) -> Dict:
+        """读取并校验输入框（非法时抛出 ValueError）"""
+        salary = float(self.salary_entry.get())
+        social_base = float(self.social_base_entry.get())
+        city = self.city_combo.get()
+        insurance_rate = float(self.insurance_rate_entry.get()) / 100
+        fund_rate = float(self.fund_rate_entry.get()) / 100
+        year_end_bonus = float(self.year_end_bonus_entry.get())
         
+        if salary <= 0 or social_base <= 0:
+            raise ValueError("税前月薪/社保基数必须大于0")
+        if not (0 < insurance_rate < 1) or not (0 < fund_rate < 1):
+            raise ValueError("比例需在0-100%之间")
+        if not city:
+            raise ValueError("请选择所在城市")
+        if year_end_bonus < 0:
+            raise ValueError("年终奖金额不能为负数")
+        return {"salary": salary, "social_base": social_base, "city": city, "insurance_rate": insurance_rate,
+                "fund_rate": fund_rate, "year_end_bonus": year_end_bonus}
+
+
+    def _calculate_and_display(self):
+        try:
+            params = self._read_inputs()
         except ValueError as e:
-            messagebox.showerror("输入错误", str(e), parent=self.root)
-        except Exception as e:
-            messagebox.showerror("计算失败", f"未知错误：{str(e)}", parent=self.root)
+            self._show_error(e)
+            return
+        self._last_params = params
+        self._submit(compute_single, (params,), lambda payload: self._display_single(params, payload),
+                     self._show_error)
+
+
+    def _display_single(self, params: Dict, payload: Tuple[Dict, Dict]):
+        result, bonus_result = payload
+        year_end_bonus = params["year_end_bonus"]
+        monthly_data = result["monthly"]
+        annual_summary = result["annual"]
+        self.status_label.config(text="")
+        
+        self._set_tree_mode("monthly")
+        self.result_tree.delete(*self.result_tree.get_children())
+        for data in monthly_data:
+            self.result_tree.insert("", tk.END, values=(
+                data["month"], data["pre_tax_income"], data["pension"], data["medical"],
+                data["unemployment"], data["housing_fund"], data["taxable_income"],
+                data["current_tax"], data["takehome"]
+            ))
+        
+        # 更新年度汇总标签（关键：从annual_summary取数据）
+        self.summary_labels["total_pre_tax"].config(text=f"全年税前收入：{annual_summary['total_pre_tax']:.2f}元")
+        self.summary_labels["total_tax"].config(text=f"全年个税合计：{annual_summary['total_tax']:.2f}元")
+        self.summary_labels["total_housing_fund"].config(text=f"全年双边公积金合计：{2*annual_summary['total_housing_fund']:.2f}元")
+        self.summary_labels["total_takehome"].config(text=f"全年税后收入：{annual_summary['total_takehome']:.2f}元")
+        self.summary_labels["total_takehome_with_housing"].config(text=f"全年税后收入（含公积金）：{annual_summary['total_takehome_with_housing']:.2f}元")
+        
+        # 更新年终奖区域（保持不变）
+        if bonus_result is not None:
+            self.lbl_bonus_amount.config(text=f"年终奖金额：{year_end_bonus:.2f}元")
+            self.lbl_bonus_tax.config(text=f"年终奖个税：{bonus_result['tax']:.2f}元")
+            self.lbl_bonus_rate.config(text=f"适用税率：{bonus_result['tax_rate']}%")
+            self.lbl_bonus_after_tax.config(text=f"年终奖税后：{bonus_result['after_tax']:.2f}元")
+            total_annual_takehome = annual_summary['total_takehome']
+            total_bonus_after_tax = bonus_result['after_tax']
+            total_housing_double = annual_summary['total_housing_fund'] * 2
+            total_cash_bonus = total_annual_takehome + total_bonus_after_tax
+            total_combined = total_cash_bonus + total_housing_double
+        else:
+            total_cash_bonus = annual_summary['total_takehome']
+            total_combined = total_cash_bonus + annual_summary['total_housing_fund'] * 2
+        
+        self.lbl_total_cash_bonus.config(text=f"税后现金+年终奖：{total_cash_bonus:.2f}元")
+        self.lbl_total_combined.config(text=f"税后现金+年终奖+双边公积金：{total_combined:.2f}元")
+
+
+    # ------------------- 批量模式（虚拟化表格） -------------------
+    def _load_batch_file(self):
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="选择工资表",
+            filetypes=[("工资表", "*.csv *.jsonl *.ndjson *.json"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        self.status_label.config(text="正在计算……")
+        started = time.perf_counter()
+        self._submit(compute_batch, (path,),
+                     lambda payload: self._display_batch(payload, time.perf_counter() - started), self._show_error,
+                     batch=True)
+
+
+    def _display_batch(self, payload: Tuple[List[str], List[str], Dict], elapsed: float):
+        ids, cities, columns = payload
+        self._set_tree_mode("batch")
+        self._batch_ids, self._batch_cities, self._batch_columns = ids, cities, columns
+        self._batch_offset = 0
+        self.status_label.config(text=f"已计算 {len(ids)} 名员工，用时 {elapsed:.2f} 秒")
+        self._render_batch_window()
+
+
+    def _visible_rows(self) -> int:
+        return max(1, self.result_tree.winfo_height() // ROW_HEIGHT - 1)  # 减去表头一行
+
+
+    def _render_batch_window(self):
+        """只把当前可见的若干行写入 result_tree（复用已有行，只改值）"""
+        if self._tree_mode != "batch":
+            return
+        total = len(self._batch_ids)
+        visible = min(self._visible_rows(), total)
+        self._batch_offset = max(0, min(self._batch_offset, total - visible))
+        fields = [col_id for col_id, _, _ in BATCH_TREE_COLUMNS[2:]]
+
+        items = self.result_tree.get_children()
+        if len(items) > visible:
+            self.result_tree.delete(*items[visible:])
+            items = items[:visible]
+        for i in range(visible):
+            row = self._batch_offset + i
+            values = [self._batch_ids[row], self._batch_cities[row]]
+            values.extend(f"{self._batch_columns[field][row]:.2f}" for field in fields)
+            if i < len(items):
+                self.result_tree.item(items[i], values=values)
+            else:
+                self.result_tree.insert("", tk.END, values=values)
+
+        if total:
+            self.tree_scrollbar.set(self._batch_offset / total, (self._batch_offset + visible) / total)
+        else:
+            self.tree_scrollbar.set(0, 1)
+
+
+    def _on_tree_scroll(self, *args):
+        """滚动条回调：批量模式下按行偏移重绘，单人模式交给 Treeview 自身滚动"""
+        if self._tree_mode != "batch":
+            self.result_tree.yview(*args)
+            return
+        visible = self._visible_rows()
+        if args[0] == "moveto":
+            self._batch_offset = int(float(args[1]) * len(self._batch_ids))
+        elif args[0] == "scroll":
+            step = visible if args[2] == "pages" else 1
+            self._batch_offset += int(args[1]) * step
+        self._render_batch_window()
+
+
+    def _on_tree_wheel(self, event):
+        if self._tree_mode != "batch":
+            return None
+        if event.num == 4 or event.delta > 0:
+            self._batch_offset -= 3
+        else:
+            self._batch_offset += 3
+        self._render_batch_window()
+        return "break"
@@ -0,0 +1,146 @@
+import argparse
+import json
+import sys
+from typing import List, Dict, Optional, TextIO
+
+# ------------------- 命令行入口（无界面） -------------------
+# python -m taxcli monthly 30000 --city 上海          单人全年明细
+# python -m taxcli annual 30000 --city 上海           单人年度汇总
+# python -m taxcli bonus 100000                       年终奖单独计税
+# python -m taxcli batch employees.csv --annual-out annual.csv   批量（参数同 runner.py）
+# python -m taxcli serve                              常驻模式：从标准输入逐行读取 JSON 请求，逐行输出结果
+#
+# 本模块只在顶层导入标准库中的轻量模块；计算模块在子命令真正用到时才导入，
+# 不会导入 tkinter，单人计算与常驻模式也不会导入 numpy。
+# 常驻模式请求格式同 HTTP 服务：{"op": "monthly" | "annual" | "bonus", "id": 可选, 其余字段为计算参数}，
+# 每行输出 {"id", "result"} 或 {"id", "error"}，单条请求出错不影响后续请求。
+
+# 启动耗时预算（毫秒）：python -m taxcli bonus 的总耗时，bench.py --startup 检查
+STARTUP_BUDGET_MS = 200
+
+
+def calculate(op: str, params: Dict) -> Dict:
+    """执行一次计算：op 为 monthly / annual / bonus，params 字段名同 calculate_monthly_details 参数"""
+    if op == "bonus":
+        from core import calculate_year_end_bonus
+        from parsing import is_number
+        bonus = params.get("year_end_bonus")
+        if not is_number(bonus):
+            raise ValueError("year_end_bonus 需为有限数值")
+        return calculate_year_end_bonus(float(bonus))
+    if op not in ("monthly", "annual"):
+        raise ValueError(f"不支持的操作：{op}")
+
+    from core import calculate_monthly_details
+    from policy import get_policy
+    from parsing import parse_series, parse_rate
+    if "monthly_salaries" not in params:
+        raise ValueError("缺少 monthly_salaries")
+    salaries = parse_series(params["monthly_salaries"], "月薪")
+    bases = params.get("social_security_bases")
+    year = params.get("year")
+    if year is not None and (not isinstance(year, int) or isinstance(year, bool)):
+        raise ValueError("year 需为整数")
+    city = params.get("city", "北京")
+    if city not in get_policy(year).index:
+        raise ValueError(f"不支持的城市：{city}")
+    result = calculate_monthly_details(
+        salaries,
+        salaries if bases is None else parse_series(bases, "社保基数"),
+        city,
+        parse_rate(params.get("five_insurance_rate", 0.105), "five_insurance_rate"),
+        parse_rate(params.get("housing_fund_rate", 0.12), "housing_fund_rate"),
+        year
+    )
+    return result["annual"] if op == "annual" else result
+
+
+def serve(stdin: TextIO, stdout: TextIO) -> int:
+    """常驻模式：逐行处理请求直到输入结束，返回出错的请求数"""
+    errors = 0
+    for line in stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求需为 JSON 对象")
+            request_id = request.get("id")
+            response = {"id": request_id, "result": calculate(request.get("op", "monthly"), request)}
+            output = json.dumps(response, ensure_ascii=False, allow_nan=False)  # NaN/Infinity 不是合法 JSON
+        except (ValueError, KeyError, TypeError, ArithmeticError) as e:  # 单条请求出错不能结束常驻进程
+            errors += 1
+            output = json.dumps({"id": request_id, "error": str(e)}, ensure_ascii=False)
+        stdout.write(output + "\n")
+        stdout.flush()  # 调用方逐行等待结果
+    return errors
+
+
+def _print_monthly_table(result: Dict, stdout: TextIO):
+    columns = ["month", "pre_tax_income", "pension", "medical", "unemployment",
+               "housing_fund", "taxable_income", "current_tax", "takehome"]
+    stdout.write("\t".join(columns) + "\n")
+    for row in result["monthly"]:
+        stdout.write("\t".join(str(row[column]) for column in columns) + "\n")
+    for key, value in result["annual"].items():
+        stdout.write(f"{key}\t{value}\n")
+
+
+def _add_salary_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("salary", help="税前月薪：单个数值或 ; 分隔的12个数值")
+    parser.add_argument("--base", help="社保基数（默认同月薪）")
+    parser.add_argument("--city", default="北京", help="城市（默认北京）")
+    parser.add_argument("--insurance-rate", type=float, default=0.105, help="五险个人比例（小数，默认0.105）")
+    parser.add_argument("--fund-rate", type=float, default=0.12, help="公积金个人比例（小数，默认0.12）")
+    parser.add_argument("--year", type=int, help="政策年度（默认 policy.DEFAULT_POLICY_YEAR）")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m taxcli", description="个税计算命令行（无界面）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    monthly = commands.add_parser("monthly", help="单人全年每月明细")
+    _add_salary_arguments(monthly)
+    monthly.add_argument("--format", choices=["json", "table"], default="json", help="输出格式")
+    annual = commands.add_parser("annual", help="单人年度汇总")
+    _add_salary_arguments(annual)
+    bonus = commands.add_parser("bonus", help="年终奖单独计税")
+    bonus.add_argument("year_end_bonus", type=float, help="年终奖金额")
+    commands.add_parser("batch", help="批量计算 CSV / JSONL（参数同 runner.py）", add_help=False)
+    commands.add_parser("serve", help="常驻模式：从标准输入逐行读取 JSON 请求")
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        from runner import main as runner_main  # 其余参数原样交给 runner
+        return runner_main(argv[1:])
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(sys.stdin, sys.stdout)
+        return 0
+
+    try:
+        if args.command == "bonus":
+            result = calculate("bonus", {"year_end_bonus": args.year_end_bonus})
+        else:
+            params = {"monthly_salaries": args.salary, "city": args.city, "five_insurance_rate": args.insurance_rate,
+                      "housing_fund_rate": args.fund_rate, "year": args.year}
+            if args.base is not None:
+                params["social_security_bases"] = args.base
+            result = calculate(args.command, params)
+        if args.command != "monthly" or args.format != "table":
+            output = json.dumps(result, ensure_ascii=False, indent=2, allow_nan=False)
+    except (ValueError, KeyError) as e:
+        print(f"计算失败：{e}", file=sys.stderr)
+        return 1
+
+    if args.command == "monthly" and args.format == "table":
+        _print_monthly_table(result, sys.stdout)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
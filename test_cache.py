@@ -0,0 +1,55 @@
+import pytest
+
+from core import calculate_monthly_details, calculate_year_end_bonus
+from policy import get_registry
+from cache import ResultCache, cached_calculate_monthly_details, cached_calculate_year_end_bonus
+
+# ------------------- 结果缓存：命中、LRU 淘汰与政策变化时失效 -------------------
+
+
+@pytest.fixture
+def registry():
+    registry = get_registry()
+    yield registry
+    registry.reload()  # 恢复数据文件中的政策
+
+
+def test_hit_returns_same_result_as_a_copy():
+    cache = ResultCache()
+    first = cached_calculate_monthly_details(30000, 30000, "上海", cache=cache)
+    first["annual"]["total_tax"] = -1
+    second = cached_calculate_monthly_details([30000] * 12, 30000, "上海", cache=cache)
+    assert second == calculate_monthly_details(30000, 30000, "上海")
+    assert cached_calculate_year_end_bonus(100000, cache=cache) == calculate_year_end_bonus(100000)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 0)
+
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    for bonus in (10000, 20000, 10000, 30000):
+        cached_calculate_year_end_bonus(bonus, cache=cache)
+    cached_calculate_year_end_bonus(20000, cache=cache)  # 最久未使用的 20000 已被淘汰
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["evictions"]) == (2, 1, 2)
+
+
+def test_add_period_invalidates(registry):
+    cache = ResultCache()
+    before = cached_calculate_monthly_details(60000, 60000, "上海", cache=cache)
+    registry.add_period("上海", "2025-01", pension=1000, medical=300, unemployment=50, housing_fund_base=20000)
+    after = cached_calculate_monthly_details(60000, 60000, "上海", cache=cache)
+    assert after != before
+    assert after == calculate_monthly_details(60000, 60000, "上海")
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_table_change_during_compute_is_not_cached(registry):
+    cache = ResultCache()
+
+    def compute():
+        registry.add_period("北京", "2025-01", pension=1000, medical=300, unemployment=50)
+        return "stale"
+
+    assert cache.get_or_compute("key", compute) == "stale"
+    assert cache.stats()["size"] == 0
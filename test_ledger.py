@@ -0,0 +1,56 @@
+import random
+import pytest
+
+from core import calculate_monthly_details
+from ledger import YearLedger
+
+# ------------------- 年度台账：逐月入账与增量重算均与全年重新计算一致 -------------------
+
+
+@pytest.fixture
+def year_data():
+    rng = random.Random(6)
+    salaries = [round(rng.uniform(5000, 80000), 2) for _ in range(12)]
+    bases = [round(rng.uniform(5000, 40000), 2) for _ in range(12)]
+    return salaries, bases
+
+
+@pytest.mark.parametrize("city", ["北京", "上海", "杭州", "深圳"])
+def test_from_year_matches_scalar(city, year_data):
+    salaries, bases = year_data
+    assert YearLedger.from_year(salaries, bases, city).result() == calculate_monthly_details(salaries, bases, city)
+
+
+def test_append_month_matches_scalar(year_data):
+    salaries, bases = year_data
+    ledger = YearLedger("上海", housing_fund_rate=0.07)
+    expected = calculate_monthly_details(salaries, bases, "上海", housing_fund_rate=0.07)
+    for month, (salary, base) in enumerate(zip(salaries, bases), start=1):
+        assert ledger.append_month(salary, base) == expected["monthly"][month - 1]
+        assert ledger.monthly_details() == expected["monthly"][:month]
+    assert ledger.result() == expected
+    with pytest.raises(ValueError):
+        ledger.append_month(10000, 10000)
+
+
+@pytest.mark.parametrize("month", [1, 5, 12])
+def test_update_month_matches_full_recompute(month, year_data):
+    salaries, bases = year_data
+    ledger = YearLedger.from_year(salaries, bases, "深圳")
+    ledger.update_month(month, salary=123456.78, social_base=9999.99)
+    salaries[month - 1], bases[month - 1] = 123456.78, 9999.99
+    assert ledger.result() == calculate_monthly_details(salaries, bases, "深圳")
+
+
+def test_update_month_before_full_year(year_data):
+    salaries, bases = year_data
+    ledger = YearLedger("北京")
+    for salary, base in zip(salaries[:6], bases[:6]):
+        ledger.append_month(salary, base)
+    ledger.update_month(3, salary=1000)
+    for salary, base in zip(salaries[6:], bases[6:]):
+        ledger.append_month(salary, base)
+    salaries[2] = 1000
+    assert ledger.result() == calculate_monthly_details(salaries, bases, "北京")
+    with pytest.raises(ValueError):
+        YearLedger("北京").update_month(1, salary=1000)
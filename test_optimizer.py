@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core import calculate_monthly_details, calculate_year_end_bonus
+from data import MONTHLY_TAX_RATE_TABLE
+from optimizer import optimize_bonus_split
+
+# ------------------- 年终奖拆分优化：与逐点暴力搜索对比 -------------------
+
+BONUS_EDGES = [12 * limit for limit, _, _ in MONTHLY_TAX_RATE_TABLE if limit != float('inf')]
+PACKAGES = [80000.0, 150000.0, 250000.0, 400000.0, 700000.0, 1200000.0, 3000000.0]
+
+
+def _total_tax(package, bonus, base, city):
+    """正向计算：工资按 (总包 - 年终奖) / 12 发放时的全年个税 + 年终奖个税"""
+    tax = calculate_monthly_details((package - bonus) / 12, base, city)["annual"]["total_tax"]
+    return tax + (calculate_year_end_bonus(bonus)["tax"] if bonus > 0 else 0.0)
+
+
+def _bonus_after_tax(bonus):
+    return bonus - calculate_year_end_bonus(bonus)["tax"] if bonus > 0 else 0.0
+
+
+@pytest.mark.parametrize("city", ["北京", "上海"])
+@pytest.mark.parametrize("package", PACKAGES)
+def test_matches_brute_force(package, city):
+    base = min(package / 12, 30000.0)
+    result = optimize_bonus_split(package, base, city)
+    bonus = float(result["bonus"][0])
+    assert float(result["total_tax"][0]) == pytest.approx(_total_tax(package, bonus, base, city), abs=0.01)
+    assert float(result["tax_saving"][0]) == pytest.approx(
+        _total_tax(package, 0.0, base, city) - _total_tax(package, bonus, base, city), abs=0.01)
+
+    grid = set(np.linspace(0, package, 200).tolist())
+    grid.update(edge + delta for edge in BONUS_EDGES for delta in (0.0, 0.01) if edge + delta <= package)
+    assert float(result["total_tax"][0]) <= min(_total_tax(package, b, base, city) for b in grid) + 0.01
+
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_bonus_avoids_dead_zones(package):
+    # "多发少得"：年终奖略超档位边界时税后反而低于边界处，最优解不应落在这些区间
+    bonus = float(optimize_bonus_split(package, 30000.0, "北京")["bonus"][0])
+    for edge in BONUS_EDGES:
+        if edge < bonus:
+            assert _bonus_after_tax(bonus) >= _bonus_after_tax(edge)
+
+
+def test_batch_matches_single():
+    cities = ["北京", "上海", "杭州"]
+    batch = optimize_bonus_split(PACKAGES[:3], 20000.0, cities)
+    for i, (package, city) in enumerate(zip(PACKAGES[:3], cities)):
+        single = optimize_bonus_split(package, 20000.0, city)
+        for key in batch:
+            assert batch[key][i] == single[key][0]
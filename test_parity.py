@@ -0,0 +1,126 @@
+import itertools
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core import calculate_monthly_details, calculate_year_end_bonus
+from policy import get_registry
+from batch import MONTHLY_FIELDS, ANNUAL_FIELDS, calculate_monthly_details_batch, calculate_year_end_bonus_batch
+from parallel import calculate_monthly_details_parallel
+from results import calculate_monthly_details_compact, MonthlyResultSet
+from sweep import sweep, SWEEP_FIELDS
+from fixedpoint import calculate_monthly_details_cents, calculate_monthly_details_decimal
+
+# ------------------- 各引擎与标量版 calculate_monthly_details 逐分一致 -------------------
+
+N_ROWS = 300
+
+
+@pytest.fixture(scope="module")
+def payroll():
+    """各城市、各税率档、逐月变化的月薪（含档位边界附近的值）"""
+    rng = np.random.default_rng(2025)
+    cities = np.array(get_registry().cities(), dtype=object)
+    salaries = np.round(rng.uniform(3000, 150000, (N_ROWS, 1)) * rng.uniform(0.8, 1.2, (N_ROWS, 12)), 2)
+    salaries[:4] = [[5000.0] * 12, [8000.0] * 12, [17000.0] * 12, [17000.01] * 12]
+    return {
+        "monthly_salaries": salaries,
+        "social_security_bases": np.round(rng.uniform(3000, 60000, N_ROWS), 2),
+        "cities": cities[rng.integers(0, len(cities), N_ROWS)],
+        "housing_fund_rates": rng.choice([0.05, 0.07, 0.12], N_ROWS),
+    }
+
+
+def _scalar(payroll, i):
+    return calculate_monthly_details(payroll["monthly_salaries"][i].tolist(),
+                                     float(payroll["social_security_bases"][i]), payroll["cities"][i],
+                                     0.105, float(payroll["housing_fund_rates"][i]))
+
+
+def _assert_matches_scalar(result, payroll):
+    for i in range(N_ROWS):
+        expected = _scalar(payroll, i)
+        for month, row in enumerate(expected["monthly"]):
+            assert ({field: result["monthly"][field][i, month] for field in MONTHLY_FIELDS}
+                    == {field: row[field] for field in MONTHLY_FIELDS})
+        assert {field: result["annual"][field][i] for field in ANNUAL_FIELDS} == expected["annual"]
+
+
+def _args(payroll):
+    return (payroll["monthly_salaries"], payroll["social_security_bases"], payroll["cities"],
+            0.105, payroll["housing_fund_rates"])
+
+
+def test_batch_matches_scalar(payroll):
+    _assert_matches_scalar(calculate_monthly_details_batch(*_args(payroll)), payroll)
+
+
+def test_parallel_matches_batch(payroll):
+    expected = calculate_monthly_details_batch(*_args(payroll))
+    result = calculate_monthly_details_parallel(*_args(payroll), workers=2, chunk_size=64)
+    for part in expected:
+        for field in expected[part]:
+            np.testing.assert_array_equal(result[part][field], expected[part][field])
+
+
+def test_compact_results_match_scalar(payroll):
+    result_set = calculate_monthly_details_compact(*_args(payroll))
+    for i in range(0, N_ROWS, 7):
+        row = result_set[i]
+        expected = _scalar(payroll, i)
+        assert list(row["monthly"]) == expected["monthly"]
+        assert dict(row["annual"]) == expected["annual"]
+
+
+@pytest.mark.parametrize("n_rows", [0, 5])
+def test_compact_save_load_round_trip(tmp_path, payroll, n_rows):
+    result_set = calculate_monthly_details_compact(
+        payroll["monthly_salaries"][:n_rows], payroll["social_security_bases"][:n_rows],
+        list(payroll["cities"][:n_rows]), 0.105, payroll["housing_fund_rates"][:n_rows])
+    path = str(tmp_path / "results.bin")
+    result_set.save(path)
+    for mmap in (True, False):
+        loaded = MonthlyResultSet.load(path, mmap=mmap)
+        assert len(loaded) == n_rows
+        for i in range(n_rows):
+            assert list(loaded[i]["monthly"]) == list(result_set[i]["monthly"])
+            assert dict(loaded[i]["annual"]) == dict(result_set[i]["annual"])
+
+
+def test_year_end_bonus_batch_matches_scalar():
+    bonuses = [1.0, 36000.0, 36000.01, 144000.0, 144000.01, 300000.0, 1000000.0]
+    result = calculate_year_end_bonus_batch(np.array(bonuses))
+    for i, bonus in enumerate(bonuses):
+        assert {key: result[key][i] for key in ("tax", "after_tax", "tax_rate")} == calculate_year_end_bonus(bonus)
+
+
+def test_sweep_matches_scalar():
+    salaries = [5000.0, 17000.0, 32345.67, 80000.0]
+    cities = get_registry().cities()
+    fund_rates = [0.05, 0.12]
+    bonuses = [0.0, 36000.0, 36000.01]
+    result = sweep(salaries, cities, fund_rates, bonuses, chunk_size=3)
+    for (i, salary), (j, city), (k, rate), (m, bonus) in itertools.product(
+            enumerate(salaries), enumerate(cities), enumerate(fund_rates), enumerate(bonuses)):
+        annual = calculate_monthly_details(salary, salary, city, 0.105, rate)["annual"]
+        bonus_result = calculate_year_end_bonus(bonus) if bonus > 0 else {"tax": 0.0, "after_tax": 0.0}
+        expected = dict(annual, bonus_tax=bonus_result["tax"], bonus_after_tax=bonus_result["after_tax"],
+                        takehome_with_bonus=annual["total_takehome"] + bonus_result["after_tax"])
+        expected["takehome_with_bonus_and_housing"] = (expected["takehome_with_bonus"]
+                                                       + annual["total_housing_fund"] * 2)
+        for field in SWEEP_FIELDS:
+            assert result[field][i, j, k, m] == expected[field], (field, salary, city, rate, bonus)
+
+
+# ------------------- 整数分引擎与 Decimal 参考实现完全一致 -------------------
+
+def test_cents_matches_decimal(payroll):
+    result = calculate_monthly_details_cents(*_args(payroll))
+    for i in range(N_ROWS):
+        expected = calculate_monthly_details_decimal(
+            payroll["monthly_salaries"][i].tolist(), float(payroll["social_security_bases"][i]),
+            payroll["cities"][i], 0.105, float(payroll["housing_fund_rates"][i]))
+        for month, row in enumerate(expected["monthly"]):
+            assert ({field: result["monthly"][field][i, month] for field in MONTHLY_FIELDS}
+                    == {field: row[field] for field in MONTHLY_FIELDS})
+        assert {field: result["annual"][field][i] for field in ANNUAL_FIELDS} == expected["annual"]
@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core import calculate_monthly_details, calculate_year_end_bonus
+from policy import get_registry
+from reverse import solve_gross_salary
+
+# ------------------- 税后反推税前：正向计算回代与暴力搜索 -------------------
+
+CITIES = get_registry().cities()
+
+
+def _annual_takehome(salary, city, bonus_months=0.0, base=None):
+    """正向计算：全年税后（含年终奖税后）"""
+    takehome = calculate_monthly_details(salary, salary if base is None else base, city)["annual"]["total_takehome"]
+    if bonus_months:
+        takehome += calculate_year_end_bonus(bonus_months * salary)["after_tax"]
+    return takehome
+
+
+@pytest.mark.parametrize("city", CITIES)
+@pytest.mark.parametrize("target", [3000.0, 8000.0, 12345.67, 20000.0, 45000.0, 100000.0])
+def test_monthly_target_round_trip(city, target):
+    gross = solve_gross_salary(target, city)
+    assert _annual_takehome(gross, city) / 12 == pytest.approx(target, abs=0.01)
+
+
+def test_fixed_social_base_round_trip():
+    gross = solve_gross_salary(20000, "上海", social_security_base=10000)
+    assert _annual_takehome(gross, "上海", base=10000) / 12 == pytest.approx(20000, abs=0.01)
+
+
+@pytest.mark.parametrize("city", CITIES)
+@pytest.mark.parametrize("target", [100000.0, 300000.0, 600000.0, 1200000.0])
+def test_bonus_months_solution_is_minimal(city, target):
+    gross = solve_gross_salary(target, city, period="annual", bonus_months=3)
+    assert _annual_takehome(gross, city, 3) == pytest.approx(target, abs=0.01)
+    # 暴力搜索：更低的月薪都达不到目标
+    assert all(_annual_takehome(salary, city, 3) < target for salary in np.linspace(1, gross, 300)[:-1])
+
+
+def test_bonus_dead_zone_is_skipped():
+    # 年终奖 36000 -> 36000.01 时税率由3%跳到10%，月薪 12000 × 3个月 附近税后不增反降
+    edge = _annual_takehome(12000, "北京", 3)
+    target = edge + 1
+    gross = solve_gross_salary(target, "北京", period="annual", bonus_months=3)
+    assert gross > 12000
+    assert _annual_takehome(gross, "北京", 3) == pytest.approx(target, abs=0.01)
+    assert all(_annual_takehome(salary, "北京", 3) < target for salary in np.arange(12000.01, gross - 0.005, 1.0))
+
+
+def test_batch_matches_single():
+    targets = [8000.0, 20000.0, 45000.0]
+    np.testing.assert_array_equal(solve_gross_salary(targets, "上海"),
+                                  [solve_gross_salary(target, "上海") for target in targets])
+
+
+def test_unreachable_target_is_nan():
+    assert np.isnan(solve_gross_salary(-1))